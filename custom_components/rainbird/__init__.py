@@ -1,54 +1,116 @@
 """Support for Rain Bird Irrigation system LNK WiFi Module."""
 
-import json
+import asyncio
 import logging
-import os
+import re
+import time
 
 import attr
-import homeassistant
 import homeassistant.helpers.config_validation as cv
 import voluptuous as vol
 from homeassistant import config_entries
-from homeassistant.components import binary_sensor, switch
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_HOST, CONF_PASSWORD, CONF_MONITORED_CONDITIONS, CONF_TRIGGER_TIME, \
-    CONF_SCAN_INTERVAL
+    CONF_SCAN_INTERVAL, CONF_ZONE, EVENT_HOMEASSISTANT_CLOSE
 from homeassistant.core import callback
-from homeassistant.helpers import config_validation
+from homeassistant.exceptions import ConfigEntryNotReady, HomeAssistantError
+from homeassistant.helpers import config_validation, entity_registry
+from homeassistant.helpers.dispatcher import async_dispatcher_connect, async_dispatcher_send
 from homeassistant.helpers.entity import Entity
 from homeassistant.helpers.typing import HomeAssistantType
-from pyrainbird import ModelAndVersion, RainbirdController
 from voluptuous import ALLOW_EXTRA
 
-DOMAIN = "rainbird"
+try:
+    from homeassistant.core import SupportsResponse
+except ImportError:  # Home Assistant < 2023.7 has no service responses
+    SupportsResponse = None
 
-DISPATCHER_UPDATE_ENTITY = DOMAIN + "_{entry_id}_update_{component_key}_{key}"
-DISPATCHER_REMOVE_ENTITY = DOMAIN + "_{entry_id}_remove_{component_key}_{key}"
-DISPATCHER_ON_LIST = DOMAIN + "_{entry_id}_on_list"
-DISPATCHER_ON_DEVICE_UPDATE = DOMAIN + "_{entry_id}_on_device_update"
-DISPATCHER_ON_STATE = DOMAIN + "_{entry_id}_on_state"
+# Modules which need pyrainbird are imported when an entry is set up, pyrainbird reads its command tables on import.
+from .breaker import RainbirdCircuitBreaker
+from .const import DOMAIN, DEFAULT_NAME, DISPATCHER_UPDATE_ENTITY, DISPATCHER_REMOVE_ENTITY, DISPATCHER_ON_LIST, \
+    DISPATCHER_ON_DEVICE_UPDATE, DISPATCHER_ON_STATE, DEFAULT_MAX_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL
+from .exceptions import RainbirdError
+from .history import RainbirdRunHistory, parse_flow_rates
+from .request_queue import DEFAULT_MIN_REQUEST_GAP, PRIORITY_POLL, RainbirdRequestQueue
 
 _LOGGER = logging.getLogger(__name__)
 
-MANIFEST = json.load(open("%s/manifest.json" % os.path.dirname(os.path.realpath(__file__))))
-VERSION = MANIFEST["version"]
-DOMAIN = MANIFEST["domain"]
-DEFAULT_NAME = MANIFEST["name"]
-
 PLATFORM_SENSOR = "sensor"
 PLATFORM_BINARY_SENSOR = "binary_sensor"
+PLATFORM_SWITCH = "switch"
+PLATFORMS = [PLATFORM_BINARY_SENSOR, PLATFORM_SWITCH, PLATFORM_SENSOR]
+MAX_CONCURRENT_PROBES = 4
+PROBE_TIMEOUT = 30
+PROBE_REQUEST_TIMEOUT = 10
 CONF_NUMBER_OF_STATIONS = "number_of_stations"
-SENSOR_TYPES = {"rainsensor": ["Rainsensor", None, "mdi:water"]}
+CONF_MIN_REQUEST_GAP = "min_request_gap"
+CONF_MIN_SCAN_INTERVAL = "min_scan_interval"
+CONF_MAX_SCAN_INTERVAL = "max_scan_interval"
+CONF_FLOW_RATES = "flow_rates"
+LEGACY_UNIQUE_ID = re.compile(r"%s_(switch_\d+|rainsensor)" % DOMAIN)
+# sensor_type [ description, unit, icon ]
+SENSOR_TYPES = {
+    "rainsensor": ["Rainsensor", None, "mdi:water"],
+    "raindelay": ["Raindelay", "d", "mdi:water-off"],
+    "seasonal_adjust": ["Seasonal adjust", "%", "mdi:sprinkler-variant"],
+    "time_drift": ["Controller time drift", "s", "mdi:clock-alert-outline"],
+    "running_zone": ["Running zone", None, "mdi:sprinkler"],
+}
+METRIC_SENSOR_TYPES = {
+    "requests": ["Requests", None, "mdi:swap-horizontal"],
+    "request_failure_rate": ["Request failure rate", "%", "mdi:alert-circle-outline"],
+    "request_retries": ["Request retries", None, "mdi:replay"],
+    "request_latency": ["Request latency", "ms", "mdi:timer-outline"],
+}
+USAGE_SENSOR_TYPES = {
+    "runtime": ["Runtime", "min", "mdi:timer-sand"],
+    "water": ["Water", "L", "mdi:water-pump"],
+}
 
 SCHEMA = {
     vol.Required(CONF_HOST): cv.string, vol.Required(CONF_PASSWORD): cv.string,
     vol.Optional(CONF_NUMBER_OF_STATIONS): int,
     vol.Optional(CONF_MONITORED_CONDITIONS): config_validation.multi_select(SENSOR_TYPES),
     vol.Optional(CONF_TRIGGER_TIME): int,
-    vol.Optional(CONF_SCAN_INTERVAL): int
+    vol.Optional(CONF_SCAN_INTERVAL): int,
+    vol.Optional(CONF_MIN_REQUEST_GAP): vol.Coerce(float),
+    vol.Optional(CONF_MIN_SCAN_INTERVAL): int,
+    vol.Optional(CONF_MAX_SCAN_INTERVAL): int,
+    vol.Optional(CONF_FLOW_RATES): cv.string
 }
 CONFIG_SCHEMA = vol.Schema({vol.Optional(DOMAIN): vol.Schema(SCHEMA)}, extra=ALLOW_EXTRA)
 
+ATTR_CIRCUIT_BREAKER = "circuit_breaker"
+ATTR_ID = "id"
+ATTR_COMMAND = "command"
+ATTR_COMMANDS = "commands"
+ATTR_PARAMETERS = "parameters"
+COMMAND_SCHEMA = vol.All(vol.Schema({
+    vol.Optional(ATTR_ID): vol.Any(cv.string, int),
+    vol.Required(CONF_HOST): vol.Any(cv.string, [cv.string]),
+    vol.Exclusive(ATTR_COMMAND, ATTR_COMMAND): cv.string,
+    vol.Optional(ATTR_PARAMETERS): vol.Any(list, cv.string, int, None),
+    vol.Exclusive(ATTR_COMMANDS, ATTR_COMMAND): vol.All(cv.ensure_list, vol.Length(min=1), [vol.Schema({
+        vol.Required(ATTR_COMMAND): cv.string,
+        vol.Optional(ATTR_PARAMETERS): vol.Any(list, cv.string, int, None)
+    })])
+}), cv.has_at_least_one_key(ATTR_COMMAND, ATTR_COMMANDS))
+ATTR_SEQUENCE = "sequence"
+ATTR_DURATION = "duration"
+RUN_SEQUENCE_SCHEMA = vol.Schema({
+    vol.Required(CONF_HOST): cv.string,
+    vol.Required(ATTR_SEQUENCE): vol.All(cv.ensure_list, [vol.Schema({
+        vol.Required(CONF_ZONE): cv.positive_int,
+        vol.Required(ATTR_DURATION): vol.All(cv.positive_int, vol.Range(min=60))
+    })])
+})
+STOP_SEQUENCE_SCHEMA = vol.Schema({vol.Required(CONF_HOST): cv.string})
+ATTR_REFRESH = "refresh"
+GET_SCHEDULE_SCHEMA = vol.Schema({
+    vol.Required(CONF_HOST): cv.string,
+    vol.Optional(ATTR_REFRESH, default=False): cv.boolean
+})
+
 RAINBIRD_MODELS = {
     0x003: ["ESP_RZXe", 0, "ESP-RZXe", False, 0, 6],
     0x007: ["ESP_ME", 1, "ESP-Me", True, 4, 6],
@@ -67,56 +129,272 @@ RAINBIRD_MODELS = {
 
 async def async_setup_entry(hass: HomeAssistantType, config_entry):
     """Set up ESPHome binary sensors based on a config entry."""
+    # pylint: disable=import-outside-toplevel
+    from .client import AsyncRainbirdController, RainbirdClient
+    from .coalescer import RainbirdCommandCoalescer
+    from .coordinator import RainbirdUpdateCoordinator
+    from .schedule import RainbirdScheduleCache
+    from .sequence import RainbirdSequenceRunner
+    from .storage import RainbirdTopologyCache
+
+    started = time.monotonic()
     _LOGGER.debug(config_entry)
     config = CONFIG_SCHEMA({DOMAIN: dict(config_entry.data)})
     _LOGGER.debug(config)
 
     host_ = config_entry.data[CONF_HOST]
-    cli = RainbirdController(host_, config_entry.data[CONF_PASSWORD],
-                             update_delay=config_entry.data[CONF_SCAN_INTERVAL], retry_sleep=3, retry=7)
     if DOMAIN not in hass.data:
         hass.data[DOMAIN] = {}
     hass_data_raibird_ = hass.data[DOMAIN]
-    hass_data_raibird_[config_entry.entry_id] = RuntimeEntryData(client=cli, entry_id=config_entry.entry_id,
-                                                                 number_of_stations=config_entry.data.get(
-                                                                     CONF_NUMBER_OF_STATIONS, None))
+    queue = RainbirdRequestQueue(host_, config_entry.data.get(CONF_MIN_REQUEST_GAP, DEFAULT_MIN_REQUEST_GAP))
+    breaker = RainbirdCircuitBreaker(host_, on_change=lambda: async_dispatcher_send(
+        hass, DISPATCHER_ON_DEVICE_UPDATE.format(entry_id=config_entry.entry_id)))
+    cli = AsyncRainbirdController(RainbirdClient(_async_get_session(hass, host_), host_,
+                                                 config_entry.data[CONF_PASSWORD], queue, breaker, retry=7,
+                                                 retry_sleep=3))
+    data = RuntimeEntryData(client=cli, entry_id=config_entry.entry_id,
+                            number_of_stations=config_entry.data.get(CONF_NUMBER_OF_STATIONS, None))
+    data.trigger_time = config_entry.data.get(CONF_TRIGGER_TIME)
+    data.monitored_conditions = config_entry.data.get(CONF_MONITORED_CONDITIONS, list(SENSOR_TYPES))
+    data.cache = RainbirdTopologyCache(hass, config_entry.entry_id)
+    data.model_and_version, data.stations, data.serial_number = await data.cache.async_load()
+    if data.model_and_version is None or (data.stations is None and not data.number_of_stations):
+        try:
+            await async_refresh_topology(hass, data)
+        except RainbirdError as e:
+            # Nothing is registered yet, the next attempt starts from scratch.
+            queue.close()
+            await _async_close_session(hass, host_)
+            raise ConfigEntryNotReady(str(e)) from e
+    else:
+        hass.async_create_task(async_refresh_topology(hass, data, background=True))
+    data.commands = RainbirdCommandCoalescer(cli)
+    hass_data_raibird_[config_entry.entry_id] = data
     if 'controllers' not in hass_data_raibird_:
         hass_data_raibird_['controllers'] = {}
     hass_data_controllers_ = hass_data_raibird_['controllers']
     hass_data_controllers_[host_] = cli
+    data.setup_duration = time.monotonic() - started
+    _LOGGER.debug("Controller %s set up in %.3fs", host_, data.setup_duration)
+    data.history = RainbirdRunHistory(hass, config_entry.entry_id,
+                                      parse_flow_rates(config_entry.data.get(CONF_FLOW_RATES)))
+    await data.history.async_load()
+    data.coordinator = RainbirdUpdateCoordinator(
+        hass, cli, host_, config_entry.entry_id, data.get_zones, config_entry.data[CONF_SCAN_INTERVAL],
+        min_interval=config_entry.data.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL),
+        max_interval=config_entry.data.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL), history=data.history)
+    hass.async_create_task(data.coordinator.async_refresh())
+    data.sequence = RainbirdSequenceRunner(hass, data.commands, data.coordinator, config_entry.entry_id)
+    hass.async_create_task(data.sequence.async_restore())
+    data.schedule = RainbirdScheduleCache(hass, cli, config_entry.entry_id)
+    await data.schedule.async_load()
+    config_entry.async_on_unload(config_entry.add_update_listener(update_listener))
+    await entity_registry.async_migrate_entries(hass, config_entry.entry_id,
+                                                lambda entry: _migrate_unique_id(entry, config_entry.entry_id))
 
-    @callback
-    def update_model_and_version():
-        hass_data_raibird_[config_entry.entry_id].model_and_version = cli.get_model_and_version()
+    async def rainbird_command_call(call):
+        hosts = call.data[CONF_HOST] if isinstance(call.data[CONF_HOST], list) else [call.data[CONF_HOST]]
+        commands = call.data.get(ATTR_COMMANDS) or [{ATTR_COMMAND: call.data[ATTR_COMMAND],
+                                                     ATTR_PARAMETERS: call.data.get(ATTR_PARAMETERS)}]
+        started = time.monotonic()
+        results = await asyncio.gather(*[_async_run_commands(hass, host, commands) for host in hosts])
+        response = {'id': call.data.get(ATTR_ID), 'duration': round(time.monotonic() - started, 3), 'results': results}
+        if len(results) == 1 and len(results[0]['commands']) == 1:
+            response['response'] = results[0]['commands'][0]['response']
+        return response
+
+    async def rainbird_command_service(call):
+        """Rainbird command service."""
+        if getattr(call, 'return_response', False):
+            return await rainbird_command_call(call)
 
-    await hass.async_add_executor_job(update_model_and_version)
+        async def _fire_response():
+            hass.bus.async_fire("rainbird_command_response_event", await rainbird_command_call(call))
 
-    async def rainbird_command_call(call):
-        params = call.data['parameters']
-        if params is None:
-            params = []
-        elif not isinstance(params, list):
-            params = [params]
+        hass.async_create_task(_fire_response())
 
-        response = await hass.async_add_executor_job(hass_data_controllers_[call.data['host']].command,
-                                                     call.data['command'], *params)
-        hass.bus.async_fire("rainbird_command_response_event", {'id': call.data['id'], 'response': response})
+    async def rainbird_run_sequence_service(call):
+        """Run zones one after another."""
+        await _get_entry_data_by_host(hass, call.data[CONF_HOST]).sequence.async_start(
+            [(step[CONF_ZONE], step[ATTR_DURATION]) for step in call.data[ATTR_SEQUENCE]])
 
-    @callback
-    def rainbird_command_service(call):
-        """Rainbird command service."""
-        hass.async_create_task(rainbird_command_call(call))
+    async def rainbird_stop_sequence_service(call):
+        """Abort running sequence."""
+        await _get_entry_data_by_host(hass, call.data[CONF_HOST]).sequence.async_stop()
+
+    async def rainbird_get_schedule_call(call):
+        data_ = _get_entry_data_by_host(hass, call.data[CONF_HOST])
+        return dict(await data_.schedule.async_get(data_.get_program_count(), max(data_.get_zones(), default=0),
+                                                   call.data[ATTR_REFRESH]), host=call.data[CONF_HOST])
+
+    async def rainbird_get_schedule_service(call):
+        """Return programs of a controller, from the cache unless a refresh is requested."""
+        if getattr(call, 'return_response', False):
+            return await rainbird_get_schedule_call(call)
+        hass.bus.async_fire("rainbird_schedule_event", await rainbird_get_schedule_call(call))
 
     # Register our service with Home Assistant.
-    hass.services.async_register(DOMAIN, "command", rainbird_command_service)
-    hass.async_create_task(
-        hass.config_entries.async_forward_entry_setup(config_entry, homeassistant.components.binary_sensor.DOMAIN))
-    hass.async_create_task(
-        hass.config_entries.async_forward_entry_setup(config_entry, homeassistant.components.switch.DOMAIN))
+    if SupportsResponse is None:
+        hass.services.async_register(DOMAIN, "command", rainbird_command_service, schema=COMMAND_SCHEMA)
+    else:
+        hass.services.async_register(DOMAIN, "command", rainbird_command_service, schema=COMMAND_SCHEMA,
+                                     supports_response=SupportsResponse.OPTIONAL)
+    if SupportsResponse is None:
+        hass.services.async_register(DOMAIN, "get_schedule", rainbird_get_schedule_service,
+                                     schema=GET_SCHEDULE_SCHEMA)
+    else:
+        hass.services.async_register(DOMAIN, "get_schedule", rainbird_get_schedule_service,
+                                     schema=GET_SCHEDULE_SCHEMA, supports_response=SupportsResponse.OPTIONAL)
+    hass.services.async_register(DOMAIN, "run_sequence", rainbird_run_sequence_service, schema=RUN_SEQUENCE_SCHEMA)
+    hass.services.async_register(DOMAIN, "stop_sequence", rainbird_stop_sequence_service,
+                                 schema=STOP_SEQUENCE_SCHEMA)
+    for platform in PLATFORMS:
+        hass.async_create_task(hass.config_entries.async_forward_entry_setup(config_entry, platform))
     # Return boolean to indicate that initialization was successfully.
     return True
 
 
+async def async_refresh_topology(hass: HomeAssistantType, data, background=False, old_zones=None):
+    """Read model, version and available stations from the controller and update the cache.
+
+    Probes of all controllers share a global concurrency limit and each of them is bounded by `PROBE_TIMEOUT`, so that
+    a slow or dead controller does not delay the others. Probe requests are not retried and time out after
+    `PROBE_REQUEST_TIMEOUT`, a controller which does not answer holds its slot only that long. Waiting for a slot is not
+    bounded, it grows by about `PROBE_REQUEST_TIMEOUT` for every `MAX_CONCURRENT_PROBES` controllers which are down.
+    Zones which appeared or vanished since the previous topology are announced to the switch platform.
+    """
+    semaphore = hass.data[DOMAIN].setdefault('probe_semaphore', asyncio.Semaphore(MAX_CONCURRENT_PROBES))
+    try:
+        async with semaphore:
+            started = time.monotonic()
+            try:
+                model_and_version, serial_number, stations = await asyncio.wait_for(_async_probe(data),
+                                                                                    PROBE_TIMEOUT)
+            except asyncio.TimeoutError as e:
+                raise RainbirdError("Controller %s did not answer within %ds" % (data.client.host,
+                                                                                 PROBE_TIMEOUT)) from e
+            finally:
+                data.probe_duration = time.monotonic() - started
+    except RainbirdError as e:
+        if not background:
+            raise
+        _LOGGER.warning("Unable to refresh topology of %s, using cached one: %s", data.client.host, e)
+        return
+    if old_zones is None:
+        old_zones = data.get_zones()
+    device_changed = data.model_and_version != model_and_version
+    data.model_and_version = model_and_version
+    data.stations = stations
+    data.serial_number = serial_number
+    await data.cache.async_save(model_and_version, stations, serial_number)
+    async_announce_zones(hass, data, old_zones)
+    if background and device_changed:
+        async_dispatcher_send(hass, DISPATCHER_ON_DEVICE_UPDATE.format(entry_id=data.entry_id))
+
+
+async def _async_probe(data):
+    """Read model, version, serial number and available stations of a controller.
+
+    The model is read first, so that a controller which does not answer fails after a single request.
+    """
+    controller = data.client.with_policy(retry=1, timeout=PROBE_REQUEST_TIMEOUT)
+    model_and_version = await controller.get_model_and_version(priority=PRIORITY_POLL)
+    requests = [_async_get_serial_number(controller)]
+    if not data.number_of_stations:
+        requests.append(controller.get_available_stations(priority=PRIORITY_POLL))
+    results = await asyncio.gather(*requests)
+    return model_and_version, results[0], results[1].stations if len(results) > 1 else None
+
+
+async def _async_get_serial_number(controller):
+    try:
+        return await controller.get_serial_number(priority=PRIORITY_POLL)
+    except RainbirdError as e:
+        # Not all models implement the command.
+        _LOGGER.debug("Unable to read serial number of %s: %s", controller.host, e)
+        return None
+
+
+@callback
+def async_announce_zones(hass: HomeAssistantType, data, old_zones):
+    """Add entities of new zones through `DISPATCHER_ON_LIST`, remove vanished ones with `DISPATCHER_REMOVE_ENTITY`."""
+    zones = data.get_zones()
+    added = [zone for zone in zones if zone not in old_zones]
+    removed = [zone for zone in old_zones if zone not in zones]
+    if added:
+        _LOGGER.info("New zones %s found on %s", added, data.client.host)
+        async_dispatcher_send(hass, DISPATCHER_ON_LIST.format(entry_id=data.entry_id), added)
+    for zone in removed:
+        _LOGGER.info("Zone %s is no longer available on %s", zone, data.client.host)
+        async_dispatcher_send(hass, DISPATCHER_REMOVE_ENTITY.format(entry_id=data.entry_id, component_key="switch",
+                                                                    key=zone))
+
+
+async def _async_run_commands(hass: HomeAssistantType, host: str, commands: list) -> dict:
+    """Run commands one by one on a single host and collect their responses, errors and timing."""
+    started = time.monotonic()
+    result = {'host': host, 'commands': [], 'error': None}
+    controller = hass.data[DOMAIN].get('controllers', {}).get(host)
+    if controller is None:
+        result['error'] = "Controller %s is not configured" % host
+    else:
+        for command in commands:
+            params = command.get('parameters')
+            if params is None:
+                params = []
+            elif not isinstance(params, list):
+                params = [params]
+            command_started = time.monotonic()
+            command_result = {'command': command['command'], 'response': None, 'error': None}
+            try:
+                command_result['response'] = await controller.raw_command(command['command'], *params)
+            except RainbirdError as e:
+                command_result['error'] = str(e)
+                result['error'] = str(e)
+            command_result['duration'] = round(time.monotonic() - command_started, 3)
+            result['commands'].append(command_result)
+    result['duration'] = round(time.monotonic() - started, 3)
+    return result
+
+
+@callback
+def _migrate_unique_id(entry: entity_registry.RegistryEntry, entry_id: str):
+    """Add the entry id to unique ids of switches and the rain sensor, they used to clash between controllers."""
+    match = LEGACY_UNIQUE_ID.fullmatch(entry.unique_id)
+    if entry.platform != DOMAIN or match is None:
+        return None
+    return {"new_unique_id": "%s_%s_%s" % (DOMAIN, entry_id, match.group(1))}
+
+
+def _get_entry_data_by_host(hass: HomeAssistantType, host: str):
+    for data in hass.data[DOMAIN].values():
+        if isinstance(data, RuntimeEntryData) and data.client.host == host:
+            return data
+    raise HomeAssistantError("Controller %s is not configured" % host)
+
+
+@callback
+def _async_get_session(hass: HomeAssistantType, host: str):
+    """Return the pooled HTTP session shared by everything talking to the given host."""
+    from .client import create_session  # pylint: disable=import-outside-toplevel
+    sessions = hass.data[DOMAIN].setdefault('sessions', {})
+    if host not in sessions:
+        if not sessions:
+            async def _async_close_sessions(event):
+                for session in hass.data[DOMAIN]['sessions'].values():
+                    await session.close()
+
+            hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _async_close_sessions)
+        sessions[host] = create_session()
+    return sessions[host]
+
+
+async def _async_close_session(hass: HomeAssistantType, host: str):
+    session = hass.data[DOMAIN].get('sessions', {}).pop(host, None)
+    if session:
+        await session.close()
+
+
 async def platform_async_setup_entry(
         hass: HomeAssistantType,
         config_entry: ConfigEntry,
@@ -139,24 +417,63 @@ async def platform_async_setup_entry(
     return await hass.config_entries.async_forward_entry_setup(config_entry, DOMAIN)
 
 
+async def async_unload_entry(hass, config_entry):
+    """Unload a config entry."""
+    unloaded = all(await asyncio.gather(*[hass.config_entries.async_forward_entry_unload(config_entry, platform)
+                                          for platform in PLATFORMS]))
+    if unloaded:
+        data = hass.data[DOMAIN].pop(config_entry.entry_id)
+        data.sequence.async_unload()
+        data.coordinator.async_unload()
+        await data.history.async_unload()
+        data.commands.close()
+        data.client.queue.close()
+        hass.data[DOMAIN]['controllers'].pop(data.client.host, None)
+        await _async_close_session(hass, data.client.host)
+    return unloaded
+
+
 async def async_remove_entry(hass, config_entry):
     """Handle removal of an entry."""
-    try:
-        await hass.config_entries.async_forward_entry_unload(config_entry,
-                                                             homeassistant.components.binary_sensor.DOMAIN)
-        await hass.config_entries.async_forward_entry_unload(config_entry, homeassistant.components.switch.DOMAIN)
-        _LOGGER.info("Successfully removed sensor from the HDO integration")
-    except ValueError:
-        pass
+    # pylint: disable=import-outside-toplevel
+    from .schedule import RainbirdScheduleCache
+    from .sequence import RainbirdSequenceRunner
+    from .storage import RainbirdTopologyCache
+
+    await RainbirdTopologyCache(hass, config_entry.entry_id).async_remove()
+    await RainbirdSequenceRunner.async_remove(hass, config_entry.entry_id)
+    await RainbirdRunHistory.async_remove(hass, config_entry.entry_id)
+    await RainbirdScheduleCache.async_remove(hass, config_entry.entry_id)
+    _LOGGER.info("Successfully removed Rainbird controller %s", config_entry.title)
 
 
 async def update_listener(hass, config_entry):
-    """Update listener."""
+    """Apply changed options in place, reload only when the connection or the set of sensors changed."""
+    old_data = config_entry.data
     config_entry.data = config_entry.options
-    await hass.config_entries.async_forward_entry_unload(config_entry, homeassistant.components.binary_sensor.DOMAIN)
-    await hass.config_entries.async_forward_entry_unload(config_entry, homeassistant.components.switch.DOMAIN)
-    await hass.config_entries.async_forward_entry_setup(config_entry, homeassistant.components.binary_sensor.DOMAIN)
-    await hass.config_entries.async_forward_entry_setup(config_entry, homeassistant.components.switch.DOMAIN)
+    if any(old_data.get(key) != config_entry.data.get(key)
+           for key in (CONF_HOST, CONF_PASSWORD, CONF_MONITORED_CONDITIONS, CONF_FLOW_RATES)):
+        await hass.config_entries.async_reload(config_entry.entry_id)
+        return
+    data = hass.data[DOMAIN][config_entry.entry_id]
+    data.client.queue.min_gap = config_entry.data.get(CONF_MIN_REQUEST_GAP, DEFAULT_MIN_REQUEST_GAP)
+    data.coordinator.async_set_intervals(config_entry.data[CONF_SCAN_INTERVAL],
+                                         config_entry.data.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL),
+                                         config_entry.data.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL))
+    data.trigger_time = config_entry.data.get(CONF_TRIGGER_TIME)
+    async_dispatcher_send(hass, DISPATCHER_ON_DEVICE_UPDATE.format(entry_id=config_entry.entry_id))
+
+    number_of_stations = config_entry.data.get(CONF_NUMBER_OF_STATIONS, None)
+    if number_of_stations != data.number_of_stations:
+        old_zones = data.get_zones()
+        data.number_of_stations = number_of_stations
+        if number_of_stations or data.stations is not None:
+            async_announce_zones(hass, data, old_zones)
+        else:
+            try:
+                await async_refresh_topology(hass, data, old_zones=old_zones)
+            except RainbirdError as e:
+                _LOGGER.warning("Unable to read available zones of %s: %s", data.client.host, e)
 
 
 @attr.s
@@ -164,9 +481,35 @@ class RuntimeEntryData:
     """Store runtime data for rainbird config entries."""
 
     entry_id = attr.ib(type=str)
-    client = attr.ib(type=RainbirdController)
+    client = attr.ib(type="AsyncRainbirdController")
     number_of_stations = attr.ib(type=int)
-    model_and_version = attr.ib(type=ModelAndVersion, init=False)
+    model_and_version = attr.ib(type="ModelAndVersion", init=False)
+    stations = attr.ib(type="States", init=False, default=None)
+    cache = attr.ib(type="RainbirdTopologyCache", init=False, default=None)
+    coordinator = attr.ib(type="RainbirdUpdateCoordinator", init=False, default=None)
+    trigger_time = attr.ib(type=int, init=False, default=None)
+    monitored_conditions = attr.ib(type=list, init=False, default=None)
+    serial_number = attr.ib(init=False, default=None)
+    setup_duration = attr.ib(type=float, init=False, default=None)
+    probe_duration = attr.ib(type=float, init=False, default=None)
+    sequence = attr.ib(type="RainbirdSequenceRunner", init=False, default=None)
+    history = attr.ib(type=RainbirdRunHistory, init=False, default=None)
+    schedule = attr.ib(type="RainbirdScheduleCache", init=False, default=None)
+    commands = attr.ib(type="RainbirdCommandCoalescer", init=False, default=None)
+
+    def get_zones(self):
+        """Return numbers of zones which should be exposed as switches."""
+        if self.number_of_stations:
+            return list(range(self.number_of_stations))
+        if self.stations:
+            return [i + 1 for i, state in enumerate(self.stations.states) if state]
+        return []
+
+    def get_program_count(self):
+        """Return number of programs supported by the model, 0 for unknown models."""
+        if self.model_and_version and self.model_and_version.model in RAINBIRD_MODELS:
+            return RAINBIRD_MODELS[self.model_and_version.model][4]
+        return 0
 
     def get_version(self):
         return "%d.%d" % (
@@ -179,6 +522,16 @@ class RuntimeEntryData:
 
 
 class RainbirdEntity(Entity):
+    """Base of Rain Bird entities.
+
+    Entities do not poll. The coordinator pushes values of `_component_key`/`_key` through `DISPATCHER_UPDATE_ENTITY`,
+    zone states every cycle and sensor values when they changed, and `DISPATCHER_ON_DEVICE_UPDATE` when availability
+    or device information changed.
+    """
+
+    _component_key = None
+    _key = None
+
     def __init__(self, hass, controller, device_id, name, data, icon, attributes=None):
         self._hass = hass
         self._controller = controller
@@ -209,9 +562,60 @@ class RainbirdEntity(Entity):
     @property
     def extra_state_attributes(self):
         """Return state attributes."""
-        return self._attributes
+        return dict(self._attributes or {}, **{ATTR_CIRCUIT_BREAKER: self._controller.breaker.state})
 
     @property
     def icon(self):
         """Return icon."""
         return self._icon
+
+    @property
+    def should_poll(self):
+        return False
+
+    @property
+    def available(self):
+        return self._data.coordinator.last_update_success and not self._controller.breaker.is_open
+
+    async def async_added_to_hass(self):
+        await super(RainbirdEntity, self).async_added_to_hass()
+        if self._component_key is not None:
+            self.async_on_remove(async_dispatcher_connect(
+                self._hass, DISPATCHER_UPDATE_ENTITY.format(entry_id=self._device_id, component_key=self._component_key,
+                                                            key=self._key), self._async_handle_value))
+            if self._data.coordinator.data is not None:
+                # The first cycle may have been published before the entity subscribed.
+                self._async_handle_value(self._value_from(self._data.coordinator.data))
+        self.async_on_remove(async_dispatcher_connect(
+            self._hass, DISPATCHER_ON_DEVICE_UPDATE.format(entry_id=self._device_id), self._async_handle_device_update))
+
+    @callback
+    def _async_handle_device_update(self):
+        """Handle changed availability, device information or options."""
+        self.async_write_ha_state()
+
+    @callback
+    def _async_track_zone_removal(self, zone):
+        """Remove this entity together with the switch of its zone when the zone is no longer available."""
+        self.async_on_remove(async_dispatcher_connect(
+            self._hass, DISPATCHER_REMOVE_ENTITY.format(entry_id=self._device_id, component_key="switch", key=zone),
+            self._async_remove_zone))
+
+    async def _async_remove_zone(self):
+        registry = entity_registry.async_get(self._hass)
+        if registry.async_get(self.entity_id):
+            registry.async_remove(self.entity_id)
+        else:
+            await self.async_remove()
+
+    def _value_from(self, state):
+        """Return value of this entity from a coordinator snapshot."""
+        return None
+
+    @callback
+    def _async_handle_value(self, value):
+        """Handle a changed value published by the coordinator."""
+
+    async def async_update(self):
+        """Refresh the whole controller when an update of this entity was requested."""
+        await self._data.coordinator.async_request_refresh()
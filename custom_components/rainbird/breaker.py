@@ -0,0 +1,85 @@
+"""Circuit breaker for unreachable Rain Bird Irrigation system LNK WiFi Modules."""
+import logging
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_MIN_BACKOFF = 30
+DEFAULT_MAX_BACKOFF = 1800
+
+
+class RainbirdCircuitBreaker:
+    """Stop talking to a controller after repeated failures.
+
+    After `failure_threshold` consecutive failed requests the breaker opens and requests are refused without any I/O.
+    Once the backoff elapses a single probe request is let through: success closes the breaker, failure opens it
+    again with a doubled backoff and a cancelled probe opens it again with the same backoff.
+    """
+
+    def __init__(self, host: str, failure_threshold=DEFAULT_FAILURE_THRESHOLD, min_backoff=DEFAULT_MIN_BACKOFF,
+                 max_backoff=DEFAULT_MAX_BACKOFF, on_change=None):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.on_change = on_change
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self._backoff = 0
+        self._next_probe = 0.
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == STATE_OPEN
+
+    def allow_request(self) -> bool:
+        """Return whether a request may be sent now, switching to half open when the backoff elapsed."""
+        if self.state == STATE_CLOSED:
+            return True
+        if self.state == STATE_OPEN and time.monotonic() >= self._next_probe:
+            self._set_state(STATE_HALF_OPEN)
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self._backoff = 0
+        if self.state != STATE_CLOSED:
+            _LOGGER.info("Controller %s is reachable again", self.host)
+            self._set_state(STATE_CLOSED)
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == STATE_HALF_OPEN:
+            self._open(min(self._backoff * 2, self.max_backoff))
+        elif self.state == STATE_CLOSED and self.failures >= self.failure_threshold:
+            _LOGGER.warning("Controller %s failed %d times in a row, pausing requests", self.host, self.failures)
+            self._open(self.min_backoff)
+
+    def release_probe(self):
+        """Open the breaker again with the same backoff when the probe request ended without an answer or failure."""
+        if self.state == STATE_HALF_OPEN:
+            self._open(self._backoff)
+
+    def _open(self, backoff: float):
+        self._backoff = backoff
+        self._next_probe = time.monotonic() + backoff
+        self._set_state(STATE_OPEN)
+
+    def _set_state(self, state: str):
+        self.state = state
+        if self.on_change is not None:
+            self.on_change()
+
+    def diagnostics(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "backoff": self._backoff,
+            "next_probe_in": round(max(0., self._next_probe - time.monotonic()), 1) if self.is_open else None,
+        }
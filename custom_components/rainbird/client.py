@@ -0,0 +1,244 @@
+"""Asyncio client for Rain Bird Irrigation system LNK WiFi Module."""
+import asyncio
+import copy
+import json
+import logging
+import time
+
+import aiohttp
+from pyrainbird import AvailableStations, ModelAndVersion, States, rainbird
+from pyrainbird.encryption import decrypt, encrypt
+
+from .breaker import STATE_HALF_OPEN, RainbirdCircuitBreaker
+from .exceptions import RainbirdAuthError, RainbirdError, RainbirdUnavailableError
+from .metrics import RAW_COMMAND, RainbirdMetrics
+from .request_queue import PRIORITY_COMMAND, RainbirdRequestQueue
+
+_LOGGER = logging.getLogger(__name__)
+
+HEAD = {
+    "Accept-Language": "en",
+    "Accept-Encoding": "gzip, deflate",
+    "User-Agent": "RainBird/2.0 CFNetwork/811.5.4 Darwin/16.7.0",
+    "Accept": "*/*",
+    "Connection": "keep-alive",
+    "Content-Type": "application/octet-stream",
+}
+
+DEFAULT_TIMEOUT = 20
+DEFAULT_RETRY = 7
+DEFAULT_RETRY_SLEEP = 3
+DEFAULT_CONNECTIONS_PER_HOST = 1
+DEFAULT_KEEPALIVE_TIMEOUT = 60
+
+
+def create_session(connections_per_host=DEFAULT_CONNECTIONS_PER_HOST,
+                   keepalive_timeout=DEFAULT_KEEPALIVE_TIMEOUT) -> aiohttp.ClientSession:
+    """Create a session which keeps a small pool of connections to a LNK module alive between requests."""
+    return aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit_per_host=connections_per_host,
+                                                                keepalive_timeout=keepalive_timeout))
+
+
+class RainbirdClient:
+    """Send encrypted SIP commands to the `/stick` endpoint of a LNK module."""
+
+    def __init__(self, session: aiohttp.ClientSession, host: str, password: str, queue: RainbirdRequestQueue,
+                 breaker: RainbirdCircuitBreaker, retry=DEFAULT_RETRY, retry_sleep=DEFAULT_RETRY_SLEEP,
+                 timeout=DEFAULT_TIMEOUT):
+        self._session = session
+        self.host = host
+        self._password = password
+        self.queue = queue
+        self.breaker = breaker
+        self._retry = retry
+        self._retry_sleep = retry_sleep
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self.metrics = RainbirdMetrics(host)
+
+    def with_policy(self, retry: int, timeout: float) -> "RainbirdClient":
+        """Return a client sharing session, queue, breaker and metrics, which retries and times out differently."""
+        client = copy.copy(self)
+        client._retry = retry
+        client._timeout = aiohttp.ClientTimeout(total=timeout)
+        return client
+
+    async def request(self, data: str, priority=PRIORITY_COMMAND, name=RAW_COMMAND) -> dict:
+        """Send hex encoded SIP data and return the decoded response.
+
+        Latency, including queueing and retries, is recorded into `metrics` under `name`. While the circuit breaker
+        is open the request fails immediately, a probe request in half open state is not retried.
+        """
+        if not self.breaker.allow_request():
+            raise RainbirdUnavailableError("Controller %s is unavailable, requests are paused" % self.host)
+        attempts = 1 if self.breaker.state == STATE_HALF_OPEN else self._retry
+        payload = json.dumps({"id": time.time(), "jsonrpc": "2.0", "method": "tunnelSip",
+                              "params": {"data": data, "length": len(data) // 2}})
+        body = encrypt(payload, self._password) if self._password else payload
+        started = time.monotonic()
+        attempt = 0
+        reachable = False
+        success = False
+        cancelled = False
+        last_error = None
+        try:
+            for attempt in range(attempts):
+                if attempt:
+                    await asyncio.sleep(self._retry_sleep)
+                try:
+                    content = await self.queue.submit(lambda: self._post(body), priority)
+                except RainbirdAuthError:
+                    reachable = True
+                    raise
+                except RainbirdError as e:
+                    last_error = e
+                    _LOGGER.debug("%s, attempt %d", e, attempt + 1)
+                    continue
+                reachable = True
+                try:
+                    response = rainbird.decode(self._decode_payload(content))
+                except (ValueError, KeyError, IndexError, TypeError) as e:
+                    raise RainbirdError("Controller %s sent a malformed response: %r" % (self.host, e)) from e
+                success = True
+                return response
+            raise last_error
+        except asyncio.CancelledError:
+            # Nothing was learnt about the controller.
+            cancelled = True
+            raise
+        finally:
+            if reachable:
+                self.breaker.record_success()
+            elif cancelled:
+                self.breaker.release_probe()
+            else:
+                self.breaker.record_failure()
+            self.metrics.record(name, time.monotonic() - started, success, attempt)
+
+    async def _post(self, body) -> bytes:
+        try:
+            async with self._session.post("http://%s/stick" % self.host, data=body, headers=HEAD,
+                                          timeout=self._timeout) as resp:
+                if resp.status == 403:
+                    raise RainbirdAuthError("Controller %s refused the password" % self.host)
+                if resp.status != 200:
+                    raise RainbirdError("Controller %s answered HTTP %d" % (self.host, resp.status))
+                return await resp.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise RainbirdError("Controller %s is not reachable: %s" % (self.host, e)) from e
+
+    def _decode_payload(self, content: bytes) -> str:
+        if self._password:
+            content = decrypt(content, self._password)
+        text = content.decode("UTF-8").rstrip("\x10").rstrip("\x0A").rstrip("\x00").rstrip()
+        response = json.loads(text)
+        if "error" in response:
+            raise RainbirdError("Controller %s returned an error: %s" % (self.host, response["error"]))
+        return response["result"]["data"]
+
+
+class AsyncRainbirdController:
+    """Asyncio counterpart of `pyrainbird.RainbirdController`."""
+
+    def __init__(self, client: RainbirdClient):
+        self._client = client
+
+    @property
+    def host(self):
+        return self._client.host
+
+    @property
+    def queue(self) -> RainbirdRequestQueue:
+        return self._client.queue
+
+    @property
+    def metrics(self) -> RainbirdMetrics:
+        return self._client.metrics
+
+    @property
+    def breaker(self) -> RainbirdCircuitBreaker:
+        return self._client.breaker
+
+    def with_policy(self, retry: int, timeout: float) -> "AsyncRainbirdController":
+        return AsyncRainbirdController(self._client.with_policy(retry, timeout))
+
+    async def command(self, command: str, *args, priority=PRIORITY_COMMAND) -> dict:
+        """Send a command by its name from the pyrainbird command set."""
+        return await self._client.request(self._encode(command, *args), priority, command)
+
+    async def raw_command(self, command: str, *args) -> dict:
+        """Send a command on behalf of the `command` service, it is accounted separately from regular traffic."""
+        return await self._client.request(self._encode(command, *args), PRIORITY_COMMAND, RAW_COMMAND)
+
+    def _encode(self, command: str, *args) -> str:
+        try:
+            return rainbird.encode(command, *args)
+        except Exception as e:  # pylint: disable=broad-except
+            # pyrainbird raises KeyError for unknown commands and bare Exception for a wrong number of parameters.
+            raise RainbirdError("Unable to encode command %s%s for %s: %r" % (command, list(args), self.host,
+                                                                              e)) from e
+
+    async def _process_command(self, command: str, response_type: str, *args, priority=PRIORITY_COMMAND) -> dict:
+        response = await self.command(command, *args, priority=priority)
+        if response.get("type") != response_type:
+            raise RainbirdError("Controller %s answered %s with %s" % (self.host, command, response.get("type")))
+        return response
+
+    async def get_model_and_version(self, priority=PRIORITY_COMMAND) -> ModelAndVersion:
+        response = await self._process_command("ModelAndVersion", "ModelAndVersionResponse", priority=priority)
+        try:
+            return ModelAndVersion(response["modelID"], response["protocolRevisionMajor"],
+                                   response["protocolRevisionMinor"])
+        except KeyError as e:
+            raise RainbirdError("Controller %s is of unsupported model %#05x" % (self.host, response["modelID"])) from e
+
+    async def get_serial_number(self, priority=PRIORITY_COMMAND):
+        response = await self._process_command("SerialNumber", "SerialNumberResponse", priority=priority)
+        return response["serialNumber"]
+
+    async def get_available_stations(self, page=0, priority=PRIORITY_COMMAND) -> AvailableStations:
+        response = await self._process_command("AvailableStations", "AvailableStationsResponse", page,
+                                               priority=priority)
+        return AvailableStations("%08x" % response["setStations"], page=response["pageNumber"])
+
+    async def get_zone_states(self, page=0, priority=PRIORITY_COMMAND) -> States:
+        response = await self._process_command("CurrentStationsActive", "CurrentStationsActiveResponse", page,
+                                               priority=priority)
+        return States("%08x" % response["activeStations"])
+
+    async def get_rain_sensor_state(self, priority=PRIORITY_COMMAND) -> bool:
+        response = await self._process_command("CurrentRainSensorState", "CurrentRainSensorStateResponse",
+                                               priority=priority)
+        return bool(response["sensorState"])
+
+    async def get_combined_state(self, priority=PRIORITY_COMMAND):
+        """Return date, time, rain delay, rain sensor, seasonal adjust and running station in a single response.
+
+        `None` is returned when the controller does not implement the command.
+        """
+        response = await self.command("CombinedControllerState", priority=priority)
+        if response.get("type") == "NotAcknowledgeResponse":
+            return None
+        if response.get("type") != "CombinedControllerStateResponse":
+            raise RainbirdError("Controller %s answered CombinedControllerState with %s" % (self.host,
+                                                                                          response.get("type")))
+        return response
+
+    async def get_schedule_block(self, block: int, priority=PRIORITY_COMMAND) -> str:
+        """Return the raw `RetrieveSchedule` response frame of a schedule block.
+
+        pyrainbird has no template for the command, so the frame is built here and the response is returned undecoded.
+        """
+        response = await self._client.request("20%04X" % block, priority, "RetrieveSchedule")
+        frame = response.get("data")
+        if frame is None or not frame.upper().startswith("A0"):
+            raise RainbirdError("Controller %s answered RetrieveSchedule %04x with %s" % (self.host, block,
+                                                                                       response.get("type")))
+        return frame.upper()
+
+    async def irrigate_zone(self, zone: int, minutes: int) -> bool:
+        await self._process_command("ManuallyRunStation", "AcknowledgeResponse", zone, minutes)
+        return True
+
+    async def stop_irrigation(self) -> bool:
+        await self._process_command("StopIrrigation", "AcknowledgeResponse")
+        return True
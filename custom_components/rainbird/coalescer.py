@@ -0,0 +1,118 @@
+"""Coalescing of switch commands for Rain Bird Irrigation system LNK WiFi Module."""
+import asyncio
+import logging
+
+from .client import AsyncRainbirdController
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_COALESCE_WINDOW = 0.5
+
+COMMAND_IRRIGATE = "irrigate"
+COMMAND_STOP = "stop"
+
+
+class RainbirdCommandCoalescer:
+    """Send only the last of the run and stop commands issued for each zone of one controller within a short window.
+
+    A later command for a zone supersedes an earlier one for the same zone, commands for other zones are kept. A stop
+    without a zone stops the whole controller, so it supersedes all runs issued before it. When the window closes the
+    stop, if any, is sent first and then the runs in the order they were issued. Windows are sent one after another,
+    the next window keeps collecting commands until the previous one was sent. Callers issuing the same command share
+    its result or error, callers whose command was superseded get `False`, as nothing was sent for them.
+    """
+
+    def __init__(self, controller: AsyncRainbirdController, window: float = DEFAULT_COALESCE_WINDOW):
+        self._controller = controller
+        self.window = window
+        # zone, or None for the whole controller -> (command, futures of its callers)
+        self._pending = {}
+        self._flush = None
+        self._sending = asyncio.Lock()
+        self.coalesced = 0
+
+    @property
+    def host(self):
+        return self._controller.host
+
+    async def irrigate_zone(self, zone: int, minutes: int) -> bool:
+        return await self._submit(zone, (COMMAND_IRRIGATE, zone, minutes))
+
+    async def stop_irrigation(self, zone: int = None) -> bool:
+        """Stop irrigation on behalf of a zone, or of the whole controller when no zone is given."""
+        return await self._submit(zone, (COMMAND_STOP,))
+
+    def close(self):
+        if self._flush is not None:
+            self._flush.cancel()
+            self._flush = None
+        for _, futures in self._pending.values():
+            for future in futures:
+                if not future.done():
+                    future.cancel()
+        self._pending = {}
+
+    async def _submit(self, zone, command) -> bool:
+        future = asyncio.get_running_loop().create_future()
+        futures = [future]
+        if zone is None:
+            for pending_command, pending_futures in self._pending.values():
+                if pending_command[0] == COMMAND_STOP:
+                    futures = pending_futures + futures
+                else:
+                    self._supersede(pending_command, pending_futures, command)
+            self._pending = {None: (command, futures)}
+        else:
+            pending = self._pending.pop(zone, None)
+            if pending is not None and pending[0] == command:
+                futures = pending[1] + futures
+            elif pending is not None:
+                self._supersede(pending[0], pending[1], command)
+            if command[0] == COMMAND_STOP and None in self._pending:
+                # The whole controller is going to be stopped already.
+                self._pending[None][1].extend(futures)
+            else:
+                self._pending[zone] = (command, futures)
+        if self._flush is None:
+            self._flush = asyncio.get_running_loop().create_task(self._async_flush())
+        return await future
+
+    def _supersede(self, command, futures, by):
+        _LOGGER.debug("Command %s for %s was superseded by %s", command, self._controller.host, by)
+        self.coalesced += len(futures)
+        for future in futures:
+            if not future.done():
+                future.set_result(False)
+
+    async def _async_flush(self):
+        await asyncio.sleep(self.window)
+        async with self._sending:
+            await self._async_send()
+
+    async def _async_send(self):
+        # Commands issued from now on open a new window.
+        pending, self._pending, self._flush = self._pending, {}, None
+        # Stopping is not zone specific, a single stop serves all zones.
+        stops = [future for command, futures in pending.values() if command[0] == COMMAND_STOP for future in futures]
+        commands = [((COMMAND_STOP,), stops)] if stops else []
+        commands += [(command, futures) for command, futures in pending.values() if command[0] == COMMAND_IRRIGATE]
+        self.coalesced += sum(len(futures) for _, futures in commands) - len(commands)
+        for index, (command, futures) in enumerate(commands):
+            try:
+                if command[0] == COMMAND_STOP:
+                    result = await self._controller.stop_irrigation()
+                else:
+                    result = await self._controller.irrigate_zone(command[1], command[2])
+            except asyncio.CancelledError:
+                for _, remaining in commands[index:]:
+                    for future in remaining:
+                        future.cancel()
+                raise
+            except Exception as e:  # pylint: disable=broad-except
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for future in futures:
+                if not future.done():
+                    future.set_result(result)
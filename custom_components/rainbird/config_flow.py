@@ -9,34 +9,64 @@ from homeassistant.const import CONF_PASSWORD, CONF_HOST, CONF_MONITORED_CONDITI
     CONF_SCAN_INTERVAL
 from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowHandler
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
-from . import DOMAIN, CONF_NUMBER_OF_STATIONS, SENSOR_TYPES
+from . import DOMAIN, CONF_NUMBER_OF_STATIONS, SENSOR_TYPES, CONF_MIN_REQUEST_GAP, CONF_MIN_SCAN_INTERVAL, \
+    CONF_MAX_SCAN_INTERVAL, CONF_FLOW_RATES, RAINBIRD_MODELS
+from .history import parse_flow_rates
+from .request_queue import DEFAULT_MIN_REQUEST_GAP
 
 _LOGGER = logging.getLogger(__name__)
 
 
-async def show_form(flow: FlowHandler, step: str, first_time: bool, data=None):
+async def show_form(flow: FlowHandler, step: str, first_time: bool, data=None, errors=None):
     if data is None:
         data = {}
     dict_ = {}
     if first_time:
-        dict_.update({vol.Required(CONF_HOST, default='rainbird.home'): str})
+        dict_.update({vol.Required(CONF_HOST, default=data.get(CONF_HOST, 'rainbird.home')): str})
     dict_.update({
         vol.Optional(CONF_PASSWORD, default=data.get(CONF_PASSWORD, None)): str,
         vol.Optional(CONF_NUMBER_OF_STATIONS, default=data.get(CONF_NUMBER_OF_STATIONS, 0)): int,
         vol.Optional(CONF_MONITORED_CONDITIONS,
                      default=data.get(CONF_MONITORED_CONDITIONS, list(SENSOR_TYPES.keys()))): cv.multi_select(
-            SENSOR_TYPES),
+            {key: value[0] for key, value in SENSOR_TYPES.items()}),
         vol.Optional(CONF_TRIGGER_TIME,
                      default=data.get(CONF_TRIGGER_TIME, {"minutes": 2})): cv.positive_time_period_dict,
         vol.Optional(CONF_SCAN_INTERVAL,
-                     default=data.get(CONF_SCAN_INTERVAL, {"seconds": 20})): cv.positive_time_period_dict
+                     default=data.get(CONF_SCAN_INTERVAL, {"seconds": 20})): cv.positive_time_period_dict,
+        vol.Optional(CONF_MIN_SCAN_INTERVAL,
+                     default=data.get(CONF_MIN_SCAN_INTERVAL, {"seconds": 5})): cv.positive_time_period_dict,
+        vol.Optional(CONF_MAX_SCAN_INTERVAL,
+                     default=data.get(CONF_MAX_SCAN_INTERVAL, {"minutes": 5})): cv.positive_time_period_dict,
+        vol.Optional(CONF_MIN_REQUEST_GAP,
+                     default=data.get(CONF_MIN_REQUEST_GAP, DEFAULT_MIN_REQUEST_GAP)): vol.Coerce(float),
+        vol.Optional(CONF_FLOW_RATES, default=data.get(CONF_FLOW_RATES, '')): str
     })
     return flow.async_show_form(
-        step_id=step, data_schema=vol.Schema(dict_), description_placeholders={"host": data.get(CONF_HOST, '')}
+        step_id=step, data_schema=vol.Schema(dict_), description_placeholders={"host": data.get(CONF_HOST, '')},
+        errors=errors
     )
 
 
+def valid_flow_rates(data) -> bool:
+    try:
+        parse_flow_rates(data.get(CONF_FLOW_RATES))
+    except ValueError:
+        return False
+    return True
+
+
+def model_name(model) -> str:
+    return RAINBIRD_MODELS[model][2] if model in RAINBIRD_MODELS else "unknown model %#05x" % model
+
+
+def discovered_name(controller) -> str:
+    if controller.password_rejected:
+        return "%s (password rejected, may not be a LNK module)" % controller.host
+    return "%s (%s)" % (controller.host, model_name(controller.model))
+
+
 def time_to_secs(data, key):
     if key in data and type(data[key]) == dict:
         data[key] = datetime.timedelta(data[key])
@@ -48,6 +78,16 @@ def secs_to_dime_dict(data: int) -> dict:
     return {"seconds": data % 60, "minutes": int(data / 60) % 60, "hours": int(data / 3600)}
 
 
+def form_defaults(data) -> dict:
+    """Return a copy of submitted form data whose periods can be used as defaults of the form again."""
+    data = dict(data)
+    for key in (CONF_TRIGGER_TIME, CONF_SCAN_INTERVAL, CONF_MIN_SCAN_INTERVAL, CONF_MAX_SCAN_INTERVAL):
+        if isinstance(data.get(key), datetime.timedelta):
+            time_to_secs(data, key)
+        time_to_dict(data, key)
+    return data
+
+
 @config_entries.HANDLERS.register(DOMAIN)
 class ConfigFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
     """Config flow for Rainbird."""
@@ -59,22 +99,71 @@ class ConfigFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         """Initialize."""
         self._errors = {}
         self._data = {}
+        self._discovered = {}
 
     async def async_step_user(self, user_input=None):  # pylint: disable=dangerous-default-value
-        """Display the form, then store values and create entry."""
+        """Display the form, then store values and create entry.
+
+        A network like `192.168.1.0/24` entered as host is scanned for LNK modules, which are then offered in the
+        `pick` step.
+        """
         self._errors = {}
         if user_input is not None:
-            if user_input[CONF_HOST]:
+            if "/" in user_input[CONF_HOST]:
+                return await self._async_scan(user_input)
+            if not valid_flow_rates(user_input):
+                self._errors[CONF_FLOW_RATES] = "flow_rates"
+            elif user_input[CONF_HOST]:
                 await self.async_set_unique_id(user_input[CONF_HOST])
                 self._abort_if_unique_id_configured()
                 time_to_secs(user_input, CONF_TRIGGER_TIME)
                 time_to_secs(user_input, CONF_SCAN_INTERVAL)
+                time_to_secs(user_input, CONF_MIN_SCAN_INTERVAL)
+                time_to_secs(user_input, CONF_MAX_SCAN_INTERVAL)
                 self._data.update(user_input)
                 # Call next step
                 return self.async_create_entry(title=self._data[CONF_HOST], data=self._data)
             else:
                 self._errors["base"] = "host"
-        return await show_form(self, "user", True)
+        return await show_form(self, "user", True, None if user_input is None else form_defaults(user_input),
+                               self._errors)
+
+    async def _async_scan(self, user_input):
+        from .discovery import async_scan  # pylint: disable=import-outside-toplevel
+        user_input = form_defaults(user_input)
+        try:
+            found = await async_scan(async_get_clientsession(self.hass), user_input[CONF_HOST],
+                                     user_input.get(CONF_PASSWORD))
+        except ValueError:
+            self._errors[CONF_HOST] = "network"
+            return await show_form(self, "user", True, user_input, self._errors)
+        configured = {entry.data.get(CONF_HOST) for entry in self._async_current_entries()}
+        # Modules which accepted the password first.
+        self._discovered = {controller.host: discovered_name(controller)
+                            for controller in sorted(found, key=lambda controller: controller.password_rejected)
+                            if controller.host not in configured}
+        if not self._discovered:
+            self._errors[CONF_HOST] = "no_devices"
+            return await show_form(self, "user", True, user_input, self._errors)
+        self._data.update(user_input)
+        return self.async_show_form(step_id="pick",
+                                    data_schema=vol.Schema({vol.Required(CONF_HOST): vol.In(self._discovered)}),
+                                    description_placeholders={"network": user_input[CONF_HOST]})
+
+    async def async_step_pick(self, user_input):
+        """Continue with the module chosen from scan results."""
+        self._data[CONF_HOST] = user_input[CONF_HOST]
+        return await show_form(self, "user", True, self._data)
+
+    async def async_step_dhcp(self, discovery_info):
+        """Offer a LNK module which was found by its DHCP host name."""
+        host = discovery_info.ip
+        await self.async_set_unique_id(host)
+        self._abort_if_unique_id_configured()
+        if any(entry.data.get(CONF_HOST) in (host, discovery_info.hostname) for entry in self._async_current_entries()):
+            return self.async_abort(reason="already_configured")
+        self.context["title_placeholders"] = {"host": host}
+        return await show_form(self, "user", True, {CONF_HOST: host})
 
     async def async_step_import(self, user_input):  # pylint: disable=unused-argument
         """Import a config entry.
@@ -118,12 +207,19 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         if user_input is None:
             time_to_dict(self._data, CONF_TRIGGER_TIME)
             time_to_dict(self._data, CONF_SCAN_INTERVAL)
+            time_to_dict(self._data, CONF_MIN_SCAN_INTERVAL)
+            time_to_dict(self._data, CONF_MAX_SCAN_INTERVAL)
             return await show_form(self, "init", False, self._data)
+        elif not valid_flow_rates(user_input):
+            self._data.update(form_defaults(user_input))
+            return await show_form(self, "init", False, self._data, {CONF_FLOW_RATES: "flow_rates"})
         else:
             # Update entry
             self._data.update(user_input)
             time_to_secs(self._data, CONF_TRIGGER_TIME)
             time_to_secs(self._data, CONF_SCAN_INTERVAL)
+            time_to_secs(self._data, CONF_MIN_SCAN_INTERVAL)
+            time_to_secs(self._data, CONF_MAX_SCAN_INTERVAL)
             return self.async_create_entry(title=self._data[CONF_HOST], data=self._data)
 
 
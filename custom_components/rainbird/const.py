@@ -0,0 +1,12 @@
+"""Constants for Rain Bird Irrigation system LNK WiFi Module."""
+
+DOMAIN = "rainbird"
+DEFAULT_NAME = "Rainbird"
+DEFAULT_MIN_SCAN_INTERVAL = 5
+DEFAULT_MAX_SCAN_INTERVAL = 300
+
+DISPATCHER_UPDATE_ENTITY = DOMAIN + "_{entry_id}_update_{component_key}_{key}"
+DISPATCHER_REMOVE_ENTITY = DOMAIN + "_{entry_id}_remove_{component_key}_{key}"
+DISPATCHER_ON_LIST = DOMAIN + "_{entry_id}_on_list"
+DISPATCHER_ON_DEVICE_UPDATE = DOMAIN + "_{entry_id}_on_device_update"
+DISPATCHER_ON_STATE = DOMAIN + "_{entry_id}_on_state"
@@ -0,0 +1,181 @@
+"""Polling coordinator for Rain Bird Irrigation system LNK WiFi Module."""
+import logging
+import time
+from datetime import datetime, timedelta
+
+import attr
+from homeassistant.core import callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.typing import HomeAssistantType
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+from pyrainbird import States
+
+from .client import AsyncRainbirdController, RainbirdError
+from .const import DEFAULT_MAX_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL, DISPATCHER_ON_DEVICE_UPDATE, \
+    DISPATCHER_ON_STATE, DISPATCHER_UPDATE_ENTITY
+from .request_queue import PRIORITY_POLL
+
+_LOGGER = logging.getLogger(__name__)
+
+IDLE_BACKOFF = 2
+FAILURE_BACKOFF = 2
+FAILURE_MAX_SCAN_INTERVAL_FACTOR = 4
+
+# Monitored condition -> `RainbirdState` attribute of the controller sensors.
+SENSOR_VALUES = {
+    "raindelay": "rain_delay",
+    "seasonal_adjust": "seasonal_adjust",
+    "time_drift": "time_drift",
+    "running_zone": "running_zone",
+}
+
+
+@attr.s(frozen=True)
+class RainbirdState:
+    """Snapshot of controller state fetched in a single poll cycle."""
+
+    zones = attr.ib(type=States)
+    rain_sensor = attr.ib(type=bool)
+    running_zone = attr.ib(type=int)
+    rain_delay = attr.ib(type=int, default=None)
+    seasonal_adjust = attr.ib(type=int, default=None)
+    time_drift = attr.ib(type=int, default=None)
+
+    def sensor_value(self, condition: str):
+        return getattr(self, SENSOR_VALUES[condition])
+
+    def is_zone_active(self, zone: int):
+        return self.zones.active(zone) if self.zones else None
+
+    def is_irrigating(self):
+        return bool(self.zones) and any(self.zones.states)
+
+
+def first_active_zone(zones: States) -> int:
+    return next((i + 1 for i, state in enumerate(zones.states) if state), 0)
+
+
+class RainbirdUpdateCoordinator(DataUpdateCoordinator):
+    """Fetch zone states and the combined controller state once per cycle for one controller.
+
+    The combined state carries the rain sensor, rain delay, seasonal adjust, controller clock and running zone, so
+    all sensors cost a single request. Controllers without the command fall back to reading the rain sensor alone.
+
+    The interval adapts to the controller: it drops to the minimum while a zone is irrigating or a run is pending.
+    On start, after irrigation and once the controller answers again it is `idle_interval`, from which it doubles
+    towards the maximum while idle. It backs off beyond the maximum while the controller keeps failing.
+
+    After each cycle the zone states are accounted into `history`, if given, with gaps capped to the maximum interval,
+    and published to entities through dispatcher signals together with the sensor values which changed.
+    """
+
+    def __init__(self, hass: HomeAssistantType, controller: AsyncRainbirdController, name: str, entry_id: str,
+                 zones, update_interval: int, min_interval: int = DEFAULT_MIN_SCAN_INTERVAL,
+                 max_interval: int = DEFAULT_MAX_SCAN_INTERVAL, history=None):
+        self._controller = controller
+        self.history = history
+        self.entry_id = entry_id
+        self._zones = zones
+        self.idle_interval = update_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._run_pending_until = 0.
+        self._published = None
+        self._published_success = True
+        self._combined_supported = True
+        super(RainbirdUpdateCoordinator, self).__init__(hass, _LOGGER, name=name,
+                                                        update_interval=timedelta(seconds=update_interval))
+        self._remove_listener = self.async_add_listener(self._async_publish)
+
+    @callback
+    def async_unload(self):
+        """Stop polling."""
+        self._remove_listener()
+
+    @callback
+    def async_set_intervals(self, idle_interval: int, min_interval: int, max_interval: int):
+        """Apply changed intervals and reschedule the next poll with them."""
+        self.idle_interval = idle_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._set_interval(self.min_interval if self._is_active(self.data) else self.idle_interval)
+        self._schedule_refresh()
+
+    async def async_run_started(self, duration: int):
+        """Poll fast until a run started for the given number of seconds is over."""
+        self._run_pending_until = max(self._run_pending_until, time.monotonic() + duration)
+        self.update_interval = timedelta(seconds=self.min_interval)
+        await self.async_request_refresh()
+
+    async def _async_update_data(self) -> RainbirdState:
+        try:
+            data = await self._async_fetch()
+        except RainbirdError as e:
+            self._set_interval(self.update_interval.total_seconds() * FAILURE_BACKOFF,
+                               self.max_interval * FAILURE_MAX_SCAN_INTERVAL_FACTOR)
+            raise UpdateFailed(str(e)) from e
+        if self.history is not None:
+            self.history.record(data, self._zones(), self.max_interval)
+        if self._is_active(data):
+            self._set_interval(self.min_interval)
+        elif self.data is None or self.data.is_irrigating() or not self.last_update_success:
+            self._set_interval(self.idle_interval)
+        else:
+            self._set_interval(self.update_interval.total_seconds() * IDLE_BACKOFF)
+        return data
+
+    def _is_active(self, data) -> bool:
+        """Return whether a zone is irrigating or a run is pending."""
+        return (data is not None and data.is_irrigating()) or time.monotonic() < self._run_pending_until
+
+    async def _async_fetch(self) -> RainbirdState:
+        zones = await self._controller.get_zone_states(priority=PRIORITY_POLL)
+        if self._combined_supported:
+            combined = await self._controller.get_combined_state(priority=PRIORITY_POLL)
+            if combined is not None:
+                return RainbirdState(zones=zones, rain_sensor=bool(combined["sensorState"]),
+                                     running_zone=combined["activeStation"], rain_delay=combined["delaySetting"],
+                                     seasonal_adjust=combined["seasonalAdjust"], time_drift=self._time_drift(combined))
+            _LOGGER.info("Controller %s does not report combined state, only the rain sensor will be read",
+                         self._controller.host)
+            self._combined_supported = False
+        rain_sensor = await self._controller.get_rain_sensor_state(priority=PRIORITY_POLL)
+        return RainbirdState(zones=zones, rain_sensor=rain_sensor, running_zone=first_active_zone(zones))
+
+    def _time_drift(self, combined: dict):
+        """Return how many seconds the controller clock is ahead of Home Assistant."""
+        try:
+            controller_time = datetime(combined["year"], combined["month"], combined["day"], combined["hour"],
+                                       combined["minute"], combined["second"], tzinfo=dt_util.DEFAULT_TIME_ZONE)
+        except ValueError:
+            _LOGGER.debug("Controller %s reported invalid date and time: %s", self._controller.host, combined)
+            return None
+        return round((controller_time - dt_util.now()).total_seconds())
+
+    @callback
+    def _async_publish(self):
+        if self.last_update_success != self._published_success:
+            self._published_success = self.last_update_success
+            async_dispatcher_send(self.hass, DISPATCHER_ON_DEVICE_UPDATE.format(entry_id=self.entry_id))
+        if self.last_update_success and self.data is not None:
+            old, self._published = self._published, self.data
+            # Switches turn on and off optimistically, so their state may differ from the previous snapshot and
+            # zone states are sent every cycle. Switches write their state only when it differs.
+            for zone in self._zones():
+                self._send_value("switch", zone, self.data.is_zone_active(zone))
+            if old is None or old.rain_sensor != self.data.rain_sensor:
+                self._send_value("binary_sensor", "rainsensor", self.data.rain_sensor)
+            for condition in SENSOR_VALUES:
+                value = self.data.sensor_value(condition)
+                if old is None or old.sensor_value(condition) != value:
+                    self._send_value("sensor", condition, value)
+        async_dispatcher_send(self.hass, DISPATCHER_ON_STATE.format(entry_id=self.entry_id), self.data)
+
+    def _send_value(self, component_key, key, value):
+        async_dispatcher_send(self.hass, DISPATCHER_UPDATE_ENTITY.format(entry_id=self.entry_id,
+                                                                         component_key=component_key, key=key), value)
+
+    def _set_interval(self, seconds: float, ceiling: float = None):
+        seconds = max(self.min_interval, min(seconds, ceiling or self.max_interval))
+        self.update_interval = timedelta(seconds=seconds)
@@ -0,0 +1,24 @@
+"""Diagnostics support for Rain Bird Irrigation system LNK WiFi Module."""
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.helpers.typing import HomeAssistantType
+from homeassistant.loader import async_get_integration
+
+from . import DOMAIN, RuntimeEntryData
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistantType, config_entry: ConfigEntry) -> dict:
+    """Return diagnostics for a config entry."""
+    data: RuntimeEntryData = hass.data[DOMAIN][config_entry.entry_id]
+    integration = await async_get_integration(hass, DOMAIN)
+    return {
+        "integration_version": str(integration.version),
+        "model": data.get_model(),
+        "version": data.get_version(),
+        "serial_number": data.serial_number,
+        "setup_duration": data.setup_duration,
+        "probe_duration": data.probe_duration,
+        "request_queue": data.client.queue.diagnostics(),
+        "circuit_breaker": data.client.breaker.diagnostics(),
+        "coalesced_commands": data.commands.coalesced,
+        "metrics": data.client.metrics.as_dict(),
+    }
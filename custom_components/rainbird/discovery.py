@@ -0,0 +1,72 @@
+"""LAN discovery of Rain Bird Irrigation system LNK WiFi Modules."""
+import asyncio
+import ipaddress
+import logging
+
+import aiohttp
+import attr
+
+from .breaker import RainbirdCircuitBreaker
+from .client import AsyncRainbirdController, RainbirdAuthError, RainbirdClient, RainbirdError
+from .request_queue import RainbirdRequestQueue
+
+_LOGGER = logging.getLogger(__name__)
+
+SCAN_CONCURRENCY = 32
+SCAN_TIMEOUT = 3
+MAX_SCAN_HOSTS = 1024
+
+
+@attr.s(frozen=True)
+class DiscoveredController:
+    """Host found by a scan.
+
+    The model is known for LNK modules which accepted the password. Hosts which rejected it cannot be told apart from
+    other devices answering HTTP 403, so they are only marked with `password_rejected`.
+    """
+
+    host = attr.ib(type=str)
+    model = attr.ib(type=int, default=None)
+    password_rejected = attr.ib(type=bool, default=False)
+
+
+async def async_probe(session: aiohttp.ClientSession, host: str, password: str, timeout=SCAN_TIMEOUT):
+    """Return `DiscoveredController` when the host answered with a SIP response or rejected the password.
+
+    `None` is returned for unreachable hosts and other HTTP servers.
+    """
+    queue = RainbirdRequestQueue(host, 0)
+    controller = AsyncRainbirdController(RainbirdClient(session, host, password, queue, RainbirdCircuitBreaker(host),
+                                                        retry=1, retry_sleep=0, timeout=timeout))
+    try:
+        response = await controller.command("ModelAndVersion")
+    except RainbirdAuthError:
+        return DiscoveredController(host, password_rejected=True)
+    except RainbirdError:
+        return None
+    finally:
+        queue.close()
+    if response.get("type") != "ModelAndVersionResponse":
+        return None
+    return DiscoveredController(host, response["modelID"])
+
+
+async def async_scan(session: aiohttp.ClientSession, network: str, password: str, concurrency=SCAN_CONCURRENCY,
+                     timeout=SCAN_TIMEOUT):
+    """Probe all hosts of a network, e.g. `192.168.1.0/24`, at most `concurrency` of them at once.
+
+    Raise `ValueError` when the network is malformed or larger than `MAX_SCAN_HOSTS`.
+    """
+    hosts = list(ipaddress.ip_network(network, strict=False).hosts())
+    if len(hosts) > MAX_SCAN_HOSTS:
+        raise ValueError("Network %s has more than %d hosts" % (network, MAX_SCAN_HOSTS))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _async_probe(host):
+        async with semaphore:
+            return await async_probe(session, str(host), password, timeout)
+
+    results = await asyncio.gather(*[_async_probe(host) for host in hosts])
+    found = [result for result in results if result is not None]
+    _LOGGER.debug("Found %d LNK modules in %s", len(found), network)
+    return found
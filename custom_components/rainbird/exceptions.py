@@ -0,0 +1,14 @@
+"""Errors of Rain Bird Irrigation system LNK WiFi Module."""
+from homeassistant.exceptions import HomeAssistantError
+
+
+class RainbirdError(HomeAssistantError):
+    """Controller did not answer or answered with an unexpected response."""
+
+
+class RainbirdAuthError(RainbirdError):
+    """Controller rejected the password."""
+
+
+class RainbirdUnavailableError(RainbirdError):
+    """Request was refused without any I/O because the circuit breaker of the controller is open."""
@@ -0,0 +1,148 @@
+"""Zone run history and water usage of Rain Bird Irrigation system LNK WiFi Module."""
+import logging
+from collections import deque
+from datetime import timedelta
+
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.typing import HomeAssistantType
+from homeassistant.util import dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+STORAGE_KEY = "rainbird.{entry_id}.history"
+SAVE_DELAY = 60
+RUN_HISTORY_SIZE = 50
+
+PERIOD_TOTAL = "total"
+PERIOD_TODAY = "today"
+PERIOD_WEEK = "week"
+
+
+def parse_flow_rates(text) -> dict:
+    """Parse comma separated `zone=litres per minute` pairs, raise `ValueError` when malformed."""
+    rates = {}
+    for item in (text or "").split(","):
+        if item.strip():
+            zone, rate = item.split("=")
+            rates[int(zone)] = float(rate)
+    return rates
+
+
+class ZoneUsage:
+    """Runtime of one zone in seconds and its last runs as (start, seconds) pairs."""
+
+    __slots__ = ("runs", "total", "today", "week", "started", "current")
+
+    def __init__(self, total=0., today=0., week=0., runs=()):
+        self.runs = deque(runs, maxlen=RUN_HISTORY_SIZE)
+        self.total = total
+        self.today = today
+        self.week = week
+        self.started = None
+        self.current = 0.
+
+    def runtime(self, period: str) -> float:
+        return getattr(self, period)
+
+
+class RainbirdRunHistory:
+    """Runtime totals of all zones of one controller.
+
+    Every successful poll adds the time elapsed since the previous one to the zones which were active, so totals and
+    the daily and weekly aggregates are updated incrementally. The time is capped, so that an outage of the controller
+    is not accounted as runtime of the zone which was active before it. Only the last `RUN_HISTORY_SIZE` runs of each
+    zone are kept. Everything is persisted with a delay to spare the disk.
+    """
+
+    def __init__(self, hass: HomeAssistantType, entry_id: str, flow_rates: dict = None):
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY.format(entry_id=entry_id))
+        self.flow_rates = flow_rates or {}
+        self.zones = {}
+        self.day_start = None
+        self.week_start = None
+        self._last_tick = None
+
+    async def async_load(self):
+        data = await self._store.async_load() or {}
+        self.zones = {int(zone): ZoneUsage(usage["total"], usage["today"], usage["week"],
+                                           [tuple(run) for run in usage["runs"]])
+                      for zone, usage in data.get("zones", {}).items()}
+        if "day_start" in data:
+            self.day_start = dt_util.parse_datetime(data["day_start"])
+            self.week_start = dt_util.parse_datetime(data["week_start"])
+        self._roll(dt_util.now())
+
+    async def async_unload(self):
+        """Write pending changes now, a delayed write could otherwise overwrite data of the reloaded entry."""
+        await self._store.async_save(self._data_to_save())
+
+    @staticmethod
+    async def async_remove(hass: HomeAssistantType, entry_id: str):
+        await Store(hass, STORAGE_VERSION, STORAGE_KEY.format(entry_id=entry_id)).async_remove()
+
+    def record(self, state, zones, max_elapsed: float = None):
+        """Account the time since the previous poll, at most `max_elapsed` seconds, to zones active then.
+
+        Runs which ended are logged.
+        """
+        now = dt_util.now()
+        self._roll(now)
+        elapsed = (now - self._last_tick).total_seconds() if self._last_tick else 0.
+        if max_elapsed is not None:
+            elapsed = min(elapsed, max_elapsed)
+        today_elapsed = min(elapsed, (now - self.day_start).total_seconds())
+        week_elapsed = min(elapsed, (now - self.week_start).total_seconds())
+        for zone in zones:
+            usage = self.zones.get(zone)
+            if usage is None:
+                usage = self.zones[zone] = ZoneUsage()
+            if usage.started is not None:
+                usage.total += elapsed
+                usage.today += today_elapsed
+                usage.week += week_elapsed
+                usage.current += elapsed
+            active = state.is_zone_active(zone)
+            if active and usage.started is None:
+                usage.started = now
+                usage.current = 0.
+            elif not active and usage.started is not None:
+                usage.runs.append((usage.started.isoformat(), round(usage.current)))
+                usage.started = None
+        self._last_tick = now
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    def runtime(self, zone=None, period=PERIOD_TOTAL) -> float:
+        """Return runtime of a zone, or of all zones, in minutes."""
+        usages = self.zones.values() if zone is None else [self.zones[zone]] if zone in self.zones else []
+        return sum(usage.runtime(period) for usage in usages) / 60
+
+    def water(self, zone=None, period=PERIOD_TOTAL):
+        """Return estimated litres used by a zone, or by all zones with a known flow rate, `None` when unknown."""
+        zones = self.flow_rates if zone is None else [zone] if zone in self.flow_rates else []
+        if not zones:
+            return None
+        return sum(self.runtime(z, period) * self.flow_rates[z] for z in zones)
+
+    def period_start(self, period: str):
+        return self.day_start if period == PERIOD_TODAY else self.week_start if period == PERIOD_WEEK else None
+
+    def _roll(self, now):
+        day_start = dt_util.start_of_local_day(now)
+        if day_start != self.day_start:
+            self.day_start = day_start
+            for usage in self.zones.values():
+                usage.today = 0.
+        week_start = day_start - timedelta(days=day_start.weekday())
+        if week_start != self.week_start:
+            self.week_start = week_start
+            for usage in self.zones.values():
+                usage.week = 0.
+
+    def _data_to_save(self) -> dict:
+        return {
+            "day_start": self.day_start.isoformat(),
+            "week_start": self.week_start.isoformat(),
+            "zones": {zone: {"total": usage.total, "today": usage.today, "week": usage.week, "runs": list(usage.runs)}
+                      for zone, usage in self.zones.items()},
+        }
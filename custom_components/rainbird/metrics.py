@@ -0,0 +1,83 @@
+"""Request instrumentation for Rain Bird Irrigation system LNK WiFi Module."""
+from bisect import bisect_left
+
+# Upper bounds of latency histogram buckets in seconds, the last bucket is unbounded.
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+RAW_COMMAND = "Raw"
+
+
+class CommandMetrics:
+    """Counters and latency histogram of one command type."""
+
+    __slots__ = ("calls", "failures", "retries", "total_latency", "max_latency", "last_latency", "histogram")
+
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.total_latency = 0.
+        self.max_latency = 0.
+        self.last_latency = 0.
+        self.histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def record(self, latency: float, success: bool, retries: int):
+        self.calls += 1
+        self.retries += retries
+        if not success:
+            self.failures += 1
+        self.total_latency += latency
+        self.last_latency = latency
+        if latency > self.max_latency:
+            self.max_latency = latency
+        self.histogram[bisect_left(LATENCY_BUCKETS, latency)] += 1
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "retries": self.retries,
+            "average_latency": round(self.total_latency / self.calls, 3) if self.calls else None,
+            "max_latency": round(self.max_latency, 3),
+            "last_latency": round(self.last_latency, 3),
+            "histogram": dict(zip([str(bucket) for bucket in LATENCY_BUCKETS] + ["+Inf"], self.histogram)),
+        }
+
+
+class RainbirdMetrics:
+    """Request metrics of one controller host, per command type."""
+
+    def __init__(self, host: str):
+        self.host = host
+        self.commands = {}
+
+    def record(self, command: str, latency: float, success: bool, retries: int):
+        metrics = self.commands.get(command)
+        if metrics is None:
+            metrics = self.commands[command] = CommandMetrics()
+        metrics.record(latency, success, retries)
+
+    @property
+    def calls(self) -> int:
+        return sum(m.calls for m in self.commands.values())
+
+    @property
+    def failures(self) -> int:
+        return sum(m.failures for m in self.commands.values())
+
+    @property
+    def retries(self) -> int:
+        return sum(m.retries for m in self.commands.values())
+
+    @property
+    def average_latency(self):
+        calls = self.calls
+        return sum(m.total_latency for m in self.commands.values()) / calls if calls else None
+
+    @property
+    def failure_rate(self):
+        calls = self.calls
+        return self.failures / calls if calls else None
+
+    def as_dict(self) -> dict:
+        return {command: metrics.as_dict() for command, metrics in self.commands.items()}
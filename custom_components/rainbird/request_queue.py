@@ -0,0 +1,96 @@
+"""Per host request queue for Rain Bird Irrigation system LNK WiFi Module."""
+import asyncio
+import itertools
+import logging
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+PRIORITY_COMMAND = 0
+PRIORITY_POLL = 10
+
+DEFAULT_MIN_REQUEST_GAP = 1.0
+
+
+class RainbirdRequestQueue:
+    """Serialize requests to one LNK module and keep a minimum gap between them.
+
+    Requests with a lower priority number are sent first, so user commands overtake background polls.
+    """
+
+    def __init__(self, host: str, min_gap: float = DEFAULT_MIN_REQUEST_GAP):
+        self.host = host
+        self.min_gap = min_gap
+        self._queue = asyncio.PriorityQueue()
+        self._sequence = itertools.count()
+        self._worker = None
+        self._next_slot = 0.
+        self._requests = 0
+        self._total_wait = 0.
+        self._last_wait = 0.
+        self._max_wait = 0.
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    async def submit(self, request, priority=PRIORITY_COMMAND):
+        """Queue a coroutine factory and return its result once it was sent."""
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((priority, next(self._sequence), time.monotonic(), request, future))
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+        return await future
+
+    def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        while not self._queue.empty():
+            future = self._queue.get_nowait()[4]
+            if not future.done():
+                future.cancel()
+
+    async def _run(self):
+        while True:
+            item = await self._queue.get()
+            delay = self._next_slot - time.monotonic()
+            if delay > 0:
+                # Put the request back so that a higher priority one can overtake it during the gap.
+                self._queue.put_nowait(item)
+                await asyncio.sleep(delay)
+                continue
+            priority, _, enqueued, request, future = item
+            if future.done():
+                continue
+            self._record_wait(time.monotonic() - enqueued)
+            try:
+                result = await request()
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:  # pylint: disable=broad-except
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                self._next_slot = time.monotonic() + self.min_gap
+
+    def _record_wait(self, wait: float):
+        self._requests += 1
+        self._total_wait += wait
+        self._last_wait = wait
+        self._max_wait = max(self._max_wait, wait)
+        _LOGGER.debug("Request to %s waited %.3fs in queue, %d still queued", self.host, wait, self.depth)
+
+    def diagnostics(self) -> dict:
+        return {
+            "depth": self.depth,
+            "min_gap": self.min_gap,
+            "requests": self._requests,
+            "last_wait": round(self._last_wait, 3),
+            "average_wait": round(self._total_wait / self._requests, 3) if self._requests else 0.,
+            "max_wait": round(self._max_wait, 3),
+        }
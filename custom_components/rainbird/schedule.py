@@ -0,0 +1,111 @@
+"""Cached irrigation schedule of Rain Bird Irrigation system LNK WiFi Module."""
+import logging
+
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.typing import HomeAssistantType
+from homeassistant.util import dt as dt_util
+
+from .client import AsyncRainbirdController
+from .request_queue import PRIORITY_POLL
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+STORAGE_KEY = "rainbird.{entry_id}.schedule"
+
+BLOCK_CONTROLLER = 0x10
+BLOCK_PROGRAM = 0x60
+BLOCK_START_TIMES = 0x80
+BLOCK_DURATIONS = 0x100
+NO_START_TIME = 0xFFFF
+
+
+def schedule_blocks(programs: int, zones: int):
+    """Return ids of the schedule blocks of a controller with given number of programs and zones."""
+    return ([BLOCK_CONTROLLER] + [BLOCK_PROGRAM + p for p in range(programs)] +
+            [BLOCK_START_TIMES + p for p in range(programs)] +
+            [BLOCK_DURATIONS + z for z in range((zones + 1) // 2)])
+
+
+def decode_schedule_block(block: int, data: str) -> dict:
+    """Decode the payload of a schedule block, durations are left as raw words."""
+    payload = data[6:]
+    if block == BLOCK_CONTROLLER:
+        return {"station_delay": int(payload[0:4], 16), "rain_delay": int(payload[4:6], 16),
+                "rain_sensor": int(payload[6:8], 16)}
+    words = [int(payload[i:i + 4], 16) for i in range(0, len(payload) - 3, 4)]
+    if block >= BLOCK_DURATIONS:
+        return {"durations": words}
+    if block >= BLOCK_START_TIMES:
+        return {"program": block - BLOCK_START_TIMES,
+                "start_times": ["%02d:%02d" % divmod(minutes, 60) for minutes in words if minutes != NO_START_TIME]}
+    fields = [int(payload[i:i + 2], 16) for i in range(0, len(payload) - 1, 2)]
+    return {"program": block - BLOCK_PROGRAM, "days_of_week_mask": fields[0], "period": fields[1],
+            "frequency": fields[5] if len(fields) > 5 else None}
+
+
+class RainbirdScheduleCache:
+    """Programs of one controller as raw `RetrieveSchedule` blocks, read once and served from the cache.
+
+    `version` increases whenever a refresh finds a block which differs from the cached one, so that consumers can
+    tell whether the schedule changed without comparing it.
+    """
+
+    def __init__(self, hass: HomeAssistantType, controller: AsyncRainbirdController, entry_id: str):
+        self._controller = controller
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY.format(entry_id=entry_id))
+        self.version = 0
+        self.fetched = None
+        self.blocks = {}
+
+    async def async_load(self):
+        data = await self._store.async_load() or {}
+        self.version = data.get("version", 0)
+        self.fetched = data.get("fetched")
+        self.blocks = {int(block, 16): frame for block, frame in data.get("blocks", {}).items()}
+
+    @staticmethod
+    async def async_remove(hass: HomeAssistantType, entry_id: str):
+        await Store(hass, STORAGE_VERSION, STORAGE_KEY.format(entry_id=entry_id)).async_remove()
+
+    async def async_get(self, programs: int, zones: int, refresh=False) -> dict:
+        """Return the decoded schedule, reading only blocks which are not cached unless `refresh` is set."""
+        blocks = schedule_blocks(programs, zones)
+        missing = blocks if refresh else [block for block in blocks if block not in self.blocks]
+        if missing:
+            await self.async_refresh(missing)
+        return self.as_dict(blocks)
+
+    async def async_refresh(self, blocks):
+        changed = []
+        for block in blocks:
+            frame = await self._controller.get_schedule_block(block, priority=PRIORITY_POLL)
+            if self.blocks.get(block) != frame:
+                self.blocks[block] = frame
+                changed.append(block)
+        self.fetched = dt_util.utcnow().isoformat()
+        if changed:
+            self.version += 1
+            _LOGGER.debug("Schedule blocks %s of %s changed, version %d", ["%04x" % block for block in changed],
+                          self._controller.host, self.version)
+        await self._store.async_save({"version": self.version, "fetched": self.fetched,
+                                      "blocks": {"%04x" % block: frame for block, frame in self.blocks.items()}})
+
+    def as_dict(self, blocks) -> dict:
+        schedule = {"version": self.version, "fetched": self.fetched, "controller": None, "programs": [],
+                    "durations": [], "blocks": {}}
+        programs = {}
+        for block in blocks:
+            frame = self.blocks.get(block)
+            if frame is None:
+                continue
+            schedule["blocks"]["%04x" % block] = frame
+            decoded = decode_schedule_block(block, frame)
+            if block == BLOCK_CONTROLLER:
+                schedule["controller"] = decoded
+            elif block >= BLOCK_DURATIONS:
+                schedule["durations"].append(dict(decoded, block="%04x" % block))
+            else:
+                programs.setdefault(decoded["program"], {}).update(decoded)
+        schedule["programs"] = [programs[program] for program in sorted(programs)]
+        return schedule
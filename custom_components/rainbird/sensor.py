@@ -0,0 +1,199 @@
+"""Support for Rain Bird Irrigation system LNK WiFi Module."""
+import logging
+from datetime import timedelta
+
+from homeassistant.components.sensor import SensorEntity, SensorStateClass
+from homeassistant.core import callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity import EntityCategory
+from homeassistant.helpers.event import async_track_time_interval
+
+from . import METRIC_SENSOR_TYPES, SENSOR_TYPES, USAGE_SENSOR_TYPES, DOMAIN, DISPATCHER_ON_LIST, DISPATCHER_ON_STATE, \
+    RuntimeEntryData, RainbirdEntity
+from .client import AsyncRainbirdController
+from .coordinator import SENSOR_VALUES
+from .history import PERIOD_TODAY, PERIOD_TOTAL, PERIOD_WEEK
+
+# Number of last runs shown in attributes of zone runtime sensors.
+RUNS_IN_ATTRIBUTES = 10
+# Request statistics change with every poll, their sensors are written at most this often.
+METRICS_UPDATE_INTERVAL = timedelta(minutes=5)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_setup_entry(hass, config_entry, async_add_entities):
+    """Set up Rain Bird sensors based on a config entry."""
+    runtime_data = hass.data.get(DOMAIN)[config_entry.entry_id]
+    async_add_entities([ControllerRainBirdSensor(runtime_data.client, hass, runtime_data, config_entry.entry_id,
+                                                 condition)
+                        for condition in runtime_data.monitored_conditions if condition in SENSOR_VALUES] +
+                       [MetricRainBirdSensor(runtime_data.client, hass, runtime_data, config_entry.entry_id, metric)
+                        for metric in METRIC_SENSOR_TYPES] +
+                       [UsageRainBirdSensor(runtime_data.client, hass, runtime_data, config_entry.entry_id, kind,
+                                            period=period)
+                        for kind in _usage_kinds(runtime_data) for period in (PERIOD_TODAY, PERIOD_WEEK)] +
+                       _zone_usage_sensors(hass, runtime_data, config_entry.entry_id, runtime_data.get_zones()))
+
+    @callback
+    def _add_zones(zones):
+        async_add_entities(_zone_usage_sensors(hass, runtime_data, config_entry.entry_id, zones))
+
+    config_entry.async_on_unload(async_dispatcher_connect(
+        hass, DISPATCHER_ON_LIST.format(entry_id=config_entry.entry_id), _add_zones))
+
+
+def _usage_kinds(data: RuntimeEntryData):
+    return [kind for kind in USAGE_SENSOR_TYPES if kind != "water" or data.history.flow_rates]
+
+
+def _zone_usage_sensors(hass, data: RuntimeEntryData, device_id, zones):
+    return [UsageRainBirdSensor(data.client, hass, data, device_id, kind, zone=zone)
+            for zone in zones for kind in USAGE_SENSOR_TYPES if kind != "water" or zone in data.history.flow_rates]
+
+
+class ControllerRainBirdSensor(RainbirdEntity, SensorEntity):
+    """A value of the combined controller state."""
+
+    _component_key = "sensor"
+
+    def __init__(self, controller: AsyncRainbirdController, hass, data: RuntimeEntryData, device_id, condition: str):
+        """Initialize the Rain Bird sensor."""
+        self._key = condition
+        super(ControllerRainBirdSensor, self).__init__(hass, controller, device_id, SENSOR_TYPES[condition][0], data,
+                                                       SENSOR_TYPES[condition][2])
+        self._attr_native_unit_of_measurement = SENSOR_TYPES[condition][1]
+        self._attr_native_value = None
+
+    @property
+    def unique_id(self):
+        """Return Unique ID string."""
+        return "%s_%s_%s" % (DOMAIN, self._device_id, self._key)
+
+    def _value_from(self, state):
+        return state.sensor_value(self._key)
+
+    @callback
+    def _async_handle_value(self, value):
+        if value != self._attr_native_value:
+            self._attr_native_value = value
+            self.async_write_ha_state()
+
+
+class MetricRainBirdSensor(RainbirdEntity, SensorEntity):
+    """Request statistics of a controller, written every `METRICS_UPDATE_INTERVAL` when they changed.
+
+    Statistics per command, including latency histograms, are only part of diagnostics.
+    """
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, controller: AsyncRainbirdController, hass, data: RuntimeEntryData, device_id, metric: str):
+        """Initialize the Rain Bird sensor."""
+        self._metric = metric
+        super(MetricRainBirdSensor, self).__init__(hass, controller, device_id, METRIC_SENSOR_TYPES[metric][0], data,
+                                                   METRIC_SENSOR_TYPES[metric][2])
+        self._attr_native_unit_of_measurement = METRIC_SENSOR_TYPES[metric][1]
+        self._written_value = None
+
+    @property
+    def unique_id(self):
+        """Return Unique ID string."""
+        return "%s_%s_%s" % (DOMAIN, self._device_id, self._metric)
+
+    @property
+    def available(self):
+        return True
+
+    async def async_added_to_hass(self):
+        await super(MetricRainBirdSensor, self).async_added_to_hass()
+        self._written_value = self.native_value
+        self.async_on_remove(async_track_time_interval(self._hass, self._async_handle_interval,
+                                                       METRICS_UPDATE_INTERVAL))
+
+    @callback
+    def _async_handle_interval(self, now):
+        value = self.native_value
+        if value != self._written_value:
+            self._written_value = value
+            self.async_write_ha_state()
+
+    @property
+    def native_value(self):
+        metrics = self._controller.metrics
+        if self._metric == "requests":
+            return metrics.calls
+        if self._metric == "request_retries":
+            return metrics.retries
+        if self._metric == "request_failure_rate":
+            return None if metrics.failure_rate is None else round(metrics.failure_rate * 100, 1)
+        return None if metrics.average_latency is None else round(metrics.average_latency * 1000)
+
+
+class UsageRainBirdSensor(RainbirdEntity, SensorEntity):
+    """Runtime or estimated water usage, total of a zone or of all zones today or this week."""
+
+    def __init__(self, controller: AsyncRainbirdController, hass, data: RuntimeEntryData, device_id, kind: str,
+                 zone=None, period=PERIOD_TOTAL):
+        """Initialize the Rain Bird sensor."""
+        self._kind = kind
+        self._zone = zone
+        self._period = period
+        if zone is None:
+            name = "%s %s" % (USAGE_SENSOR_TYPES[kind][0], "today" if period == PERIOD_TODAY else "this week")
+        else:
+            name = "Zone %s %s" % (zone, USAGE_SENSOR_TYPES[kind][0].lower())
+        super(UsageRainBirdSensor, self).__init__(hass, controller, device_id, name, data, USAGE_SENSOR_TYPES[kind][2])
+        self._attr_native_unit_of_measurement = USAGE_SENSOR_TYPES[kind][1]
+        self._attr_state_class = SensorStateClass.TOTAL_INCREASING if period == PERIOD_TOTAL else SensorStateClass.TOTAL
+        self._written_value = None
+
+    @property
+    def unique_id(self):
+        """Return Unique ID string."""
+        return "%s_%s_%s_%s" % (DOMAIN, self._device_id, self._kind, self._period if self._zone is None else self._zone)
+
+    @property
+    def available(self):
+        return True
+
+    async def async_added_to_hass(self):
+        await super(UsageRainBirdSensor, self).async_added_to_hass()
+        self.async_on_remove(async_dispatcher_connect(
+            self._hass, DISPATCHER_ON_STATE.format(entry_id=self._device_id), self._async_handle_cycle))
+        if self._zone is not None:
+            self._async_track_zone_removal(self._zone)
+
+    @callback
+    def _async_handle_cycle(self, state):
+        value = self.native_value
+        if value != self._written_value:
+            self._written_value = value
+            self.async_write_ha_state()
+
+    @property
+    def native_value(self):
+        history = self._data.history
+        if self._kind == "water":
+            value = history.water(self._zone, self._period)
+        else:
+            value = history.runtime(self._zone, self._period)
+        return None if value is None else round(value, 1)
+
+    @property
+    def last_reset(self):
+        return self._data.history.period_start(self._period)
+
+    @property
+    def extra_state_attributes(self):
+        """Return daily and weekly aggregates and the last runs of a zone."""
+        attributes = super(UsageRainBirdSensor, self).extra_state_attributes
+        if self._zone is not None and self._kind == "runtime":
+            history = self._data.history
+            usage = history.zones.get(self._zone)
+            attributes.update({
+                "today": round(history.runtime(self._zone, PERIOD_TODAY), 1),
+                "this_week": round(history.runtime(self._zone, PERIOD_WEEK), 1),
+                "last_runs": [] if usage is None else list(usage.runs)[-RUNS_IN_ATTRIBUTES:],
+            })
+        return attributes
@@ -0,0 +1,148 @@
+"""Zone sequences for Rain Bird Irrigation system LNK WiFi Module."""
+import logging
+import math
+from datetime import timedelta
+
+from homeassistant.core import callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.typing import HomeAssistantType
+from homeassistant.util import dt as dt_util
+
+from .client import RainbirdError
+from .coalescer import RainbirdCommandCoalescer
+from .coordinator import RainbirdUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+STORAGE_KEY = "rainbird.{entry_id}.sequence"
+
+
+class RainbirdSequenceRunner:
+    """Run an ordered list of (zone, seconds) steps on one controller.
+
+    Each step is started by a timer exactly when the previous one ends, so no poll is needed to advance. Progress is
+    persisted, and a sequence interrupted by a restart continues with the step which should be running by now.
+    Commands go through the coalescer of the controller, so they are ordered with those of switches.
+    """
+
+    def __init__(self, hass: HomeAssistantType, commands: RainbirdCommandCoalescer,
+                 coordinator: RainbirdUpdateCoordinator, entry_id: str):
+        self._hass = hass
+        self._commands = commands
+        self._coordinator = coordinator
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY.format(entry_id=entry_id))
+        self._steps = []
+        self._index = -1
+        self._step_end = None
+        self._cancel_timer = None
+
+    @property
+    def running(self) -> bool:
+        return self._step_end is not None
+
+    async def async_start(self, steps):
+        """Start a new sequence, replacing the one currently running.
+
+        Raise `HomeAssistantError` when the first zone could not be started.
+        """
+        self._cancel()
+        self._steps = [[int(zone), int(duration) // 60 * 60] for zone, duration in steps]
+        self._index = -1
+        try:
+            await self._async_advance(raise_error=True)
+        except RainbirdError as e:
+            raise HomeAssistantError("Sequence on %s could not be started: %s" % (self._commands.host, e)) from e
+
+    async def async_restore(self):
+        """Continue a sequence which was running before Home Assistant restarted.
+
+        The progress is discarded when the step which should be running could not be started.
+        """
+        data = await self._store.async_load()
+        if not data:
+            return
+        try:
+            self._steps = data["steps"]
+            self._index = data["index"]
+            end = dt_util.parse_datetime(data["end"])
+            now = dt_util.utcnow()
+            while end <= now and self._index + 1 < len(self._steps):
+                self._index += 1
+                end += timedelta(seconds=self._steps[self._index][1])
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            _LOGGER.warning("Discarding malformed sequence progress of %s: %s", self._commands.host, e)
+            await self.async_stop(stop_irrigation=False)
+            return
+        if end <= now:
+            await self.async_stop(stop_irrigation=False)
+            return
+        if self._index != data["index"]:
+            _LOGGER.info("Resuming sequence on %s at step %d", self._commands.host, self._index + 1)
+            try:
+                await self._async_start_step(math.ceil((end - now).total_seconds() / 60))
+            except RainbirdError as e:
+                _LOGGER.error("Sequence on %s could not be resumed, zone %d could not be started: %s",
+                              self._commands.host, self._steps[self._index][0], e)
+                await self.async_stop(stop_irrigation=False)
+                return
+        self._schedule(end)
+
+    @callback
+    def async_unload(self):
+        """Stop timers and keep the persisted progress, so that the sequence continues after reload."""
+        self._cancel()
+
+    @staticmethod
+    async def async_remove(hass: HomeAssistantType, entry_id: str):
+        await Store(hass, STORAGE_VERSION, STORAGE_KEY.format(entry_id=entry_id)).async_remove()
+
+    async def async_stop(self, stop_irrigation=True):
+        """Abort the running sequence."""
+        self._cancel()
+        self._steps = []
+        self._index = -1
+        await self._store.async_remove()
+        if stop_irrigation:
+            await self._commands.stop_irrigation()
+
+    def _cancel(self):
+        if self._cancel_timer:
+            self._cancel_timer()
+            self._cancel_timer = None
+        self._step_end = None
+
+    async def _async_advance(self, raise_error=False):
+        self._index += 1
+        if self._index >= len(self._steps):
+            await self.async_stop(stop_irrigation=False)
+            return
+        zone, duration = self._steps[self._index]
+        try:
+            await self._async_start_step(duration // 60)
+        except RainbirdError as e:
+            await self.async_stop(stop_irrigation=False)
+            if raise_error:
+                raise
+            _LOGGER.error("Sequence on %s stopped, zone %d could not be started: %s", self._commands.host, zone, e)
+            return
+        self._schedule(dt_util.utcnow() + timedelta(seconds=duration))
+
+    async def _async_start_step(self, minutes: int):
+        zone = self._steps[self._index][0]
+        if not await self._commands.irrigate_zone(zone, minutes):
+            raise RainbirdError("Run of zone %d on %s was superseded by a later command" % (zone, self._commands.host))
+        await self._coordinator.async_run_started(minutes * 60)
+
+    def _schedule(self, end):
+        self._step_end = end
+        self._cancel_timer = async_track_point_in_utc_time(self._hass, self._async_step_finished, end)
+        self._hass.async_create_task(self._store.async_save(
+            {"steps": self._steps, "index": self._index, "end": end.isoformat()}))
+
+    @callback
+    def _async_step_finished(self, now):
+        self._cancel_timer = None
+        self._hass.async_create_task(self._async_advance())
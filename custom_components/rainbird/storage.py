@@ -0,0 +1,40 @@
+"""Persistent cache of controller topology for Rain Bird Irrigation system LNK WiFi Module."""
+import logging
+
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.typing import HomeAssistantType
+from pyrainbird import ModelAndVersion, States
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+STORAGE_KEY = "rainbird.{entry_id}"
+
+
+def stations_to_mask(stations: States) -> str:
+    return "%0*x" % (stations.count // 4, stations.mask)
+
+
+class RainbirdTopologyCache:
+    """Last known model, version, serial number and available stations of one controller."""
+
+    def __init__(self, hass: HomeAssistantType, entry_id: str):
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY.format(entry_id=entry_id))
+
+    async def async_load(self):
+        """Return cached `ModelAndVersion`, available station `States` and serial number, `None` for unknown values."""
+        data = await self._store.async_load() or {}
+        model_and_version = ModelAndVersion(data["model"], data["major"], data["minor"]) if "model" in data else None
+        stations = States(data["stations"]) if data.get("stations") else None
+        return model_and_version, stations, data.get("serial_number")
+
+    async def async_save(self, model_and_version: ModelAndVersion, stations: States = None, serial_number=None):
+        data = {"model": model_and_version.model, "major": model_and_version.major, "minor": model_and_version.minor}
+        if stations is not None:
+            data["stations"] = stations_to_mask(stations)
+        if serial_number is not None:
+            data["serial_number"] = serial_number
+        await self._store.async_save(data)
+
+    async def async_remove(self):
+        await self._store.async_remove()
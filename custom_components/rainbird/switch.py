@@ -1,49 +1,43 @@
 """Support for Rain Bird Irrigation system LNK WiFi Module."""
 import logging
+from datetime import timedelta
 from typing import Any, Coroutine
 
-import asyncio
 import voluptuous as vol
-from homeassistant.components.switch import PLATFORM_SCHEMA, SwitchEntity
+from homeassistant.components.switch import SwitchEntity
 from homeassistant.const import (
     CONF_FRIENDLY_NAME,
-    CONF_SCAN_INTERVAL,
-    CONF_SWITCHES,
     CONF_TRIGGER_TIME,
     CONF_ZONE, CONF_HOST, )
+from homeassistant.core import callback
 from homeassistant.helpers import config_validation as cv, entity_platform
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.event import async_track_point_in_utc_time
 from homeassistant.helpers.typing import HomeAssistantType
-from pyrainbird import RainbirdController
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
 
-from . import RuntimeEntryData, DOMAIN, RainbirdEntity
+from . import RuntimeEntryData, DOMAIN, RainbirdEntity, DISPATCHER_ON_LIST
+from .client import AsyncRainbirdController
 
 CONF_ZONE_RUN_TIME = "zone_run_time"
 DEFAULT_ZONE_RUN = 120
 
 _LOGGER = logging.getLogger(__name__)
-PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
-    {vol.Required(CONF_SWITCHES, default={}): vol.Schema(
-        {
-            cv.string: {
-                vol.Optional(CONF_FRIENDLY_NAME): cv.string,
-                vol.Required(CONF_ZONE): cv.string,
-                vol.Required(CONF_TRIGGER_TIME): cv.string,
-                vol.Optional(CONF_SCAN_INTERVAL): cv.string,
-            }
-        }
-    )}
-)
 
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up ESPHome binary sensors based on a config entry."""
     data = hass.data.get(DOMAIN)[config_entry.entry_id]
 
-    def _add_entities(future: asyncio.futures.Future):
-        async_add_entities(future.result(), True)
+    async_add_entities(_get_entities(config_entry, data, hass, data.get_zones()))
 
-    hass.async_add_executor_job(_get_entities, config_entry, data, hass).add_done_callback(_add_entities)
+    @callback
+    def _add_zones(zones):
+        async_add_entities(_get_entities(config_entry, data, hass, zones))
+
+    config_entry.async_on_unload(
+        async_dispatcher_connect(hass, DISPATCHER_ON_LIST.format(entry_id=config_entry.entry_id), _add_zones))
     platform = entity_platform.async_get_current_platform()
     platform.async_register_entity_service("start_zone", {
         vol.Optional(
@@ -52,65 +46,114 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     }, "async_start_zone")
 
 
-def _get_entities(config_entry, data: RuntimeEntryData, hass: HomeAssistantType):
-    entities = []
-    if data.number_of_stations:
-        for i in range(data.number_of_stations):
-            entities.append(RainBirdSwitch(data.client,
-                                           {"zone": i, "id": config_entry.entry_id, **config_entry.data}, hass, data))
-    else:
-        i = 0
-        stations = data.client.get_available_stations()
-        if stations:
-            for state in stations.stations.states:
-                i = i + 1
-                if state:
-                    entities.append(RainBirdSwitch(data.client,
-                                                   {"zone": i, "id": config_entry.entry_id, **config_entry.data}, hass,
-                                                   data))
-    return entities
+def _get_entities(config_entry, data: RuntimeEntryData, hass: HomeAssistantType, zones):
+    return [RainBirdSwitch(data.client, {"zone": zone, "id": config_entry.entry_id, **config_entry.data}, hass, data)
+            for zone in zones]
 
 
 class RainBirdSwitch(RainbirdEntity, SwitchEntity):
     """Representation of a Rain Bird switch."""
 
-    def __init__(self, rb: RainbirdController, device_info: dict, hass: HomeAssistantType,
+    _component_key = "switch"
+
+    def __init__(self, rb: AsyncRainbirdController, device_info: dict, hass: HomeAssistantType,
                  data: RuntimeEntryData = None):
         """Initialize a Rain Bird Switch Device."""
         self._zone = int(device_info.get(CONF_ZONE))
+        self._key = self._zone
         self._attr_duration = device_info.get(CONF_TRIGGER_TIME)
         super(RainBirdSwitch, self).__init__(hass, rb, device_info.get("id"),
                                              device_info.get(CONF_FRIENDLY_NAME, "Rainbird {} #{}").format(
                                                  device_info.get(CONF_HOST), self._zone), data, 'mdi:sprinkler-variant',
                                              attributes={"duration": self._attr_duration, "zone": self._zone})
         self._state = None
+        self._end_time = None
+        self._cancel_expiry = None
 
     @property
     def unique_id(self):
         """Return Unique ID string."""
-        return "%s_switch_%d" % (DOMAIN, self._zone)
+        return "%s_%s_switch_%d" % (DOMAIN, self._device_id, self._zone)
 
-    def turn_on(self, **kwargs):
+    async def async_turn_on(self, **kwargs):
         """Turn the switch on."""
         duration = kwargs["duration"] if "duration" in kwargs else self._attr_duration
-        response = self._controller.irrigate_zone(int(self._zone), int(duration // 60))
+        minutes = int(duration // 60)
+        response = await self._data.commands.irrigate_zone(int(self._zone), minutes)
         if response:
             self._state = True
+            self._schedule_expiry(dt_util.utcnow() + timedelta(minutes=minutes))
+            self.async_write_ha_state()
+            await self._data.coordinator.async_run_started(minutes * 60)
 
-    def turn_off(self, **kwargs):
+    async def async_turn_off(self, **kwargs):
         """Turn the switch off."""
-        response = self._controller.stop_irrigation()
+        if self._data.sequence.running:
+            await self._data.sequence.async_stop(stop_irrigation=False)
+        response = await self._data.commands.stop_irrigation(self._zone)
         if response:
             self._state = False
+            self._schedule_expiry(None)
+            self.async_write_ha_state()
+
+    async def async_added_to_hass(self):
+        await super(RainBirdSwitch, self).async_added_to_hass()
+        self._async_track_zone_removal(self._zone)
+
+    @callback
+    def _async_handle_device_update(self):
+        self._attr_duration = self._data.trigger_time
+        self._attributes["duration"] = self._attr_duration
+        super(RainBirdSwitch, self)._async_handle_device_update()
+
+    async def async_will_remove_from_hass(self):
+        self._schedule_expiry(None)
+        await super(RainBirdSwitch, self).async_will_remove_from_hass()
 
     @property
     def is_on(self):
         """Return true if switch is on."""
         return self._state
 
-    def update(self):
-        """Update switch status."""
-        self._state = self._controller.get_zone_state(self._zone)
+    @property
+    def extra_state_attributes(self):
+        """Return state attributes including the expected end of the current run.
+
+        Remaining time is left to templates, the state is written only when it changes, so it would not count down.
+        """
+        attributes = super(RainBirdSwitch, self).extra_state_attributes
+        if self._end_time is not None:
+            attributes.update(end_time=self._end_time.isoformat())
+        return attributes
+
+    def _schedule_expiry(self, end_time):
+        """Turn the switch off locally at `end_time` so that no poll is needed to learn that the run finished."""
+        if self._cancel_expiry:
+            self._cancel_expiry()
+            self._cancel_expiry = None
+        self._end_time = end_time
+        if end_time is not None:
+            self._cancel_expiry = async_track_point_in_utc_time(self._hass, self._async_run_expired, end_time)
+
+    @callback
+    def _async_run_expired(self, now):
+        self._cancel_expiry = None
+        self._end_time = None
+        self._state = False
+        self.async_write_ha_state()
+
+    def _value_from(self, state):
+        return state.is_zone_active(self._zone)
+
+    @callback
+    def _async_handle_value(self, value):
+        """Reconcile switch state with the controller."""
+        if value == self._state and (value or self._end_time is None):
+            return
+        self._state = value
+        if not value:
+            self._schedule_expiry(None)
+        self.async_write_ha_state()
 
     async def async_start_zone(self, *, zone_run_time: int) -> None:
         """Start a particular zone for a certain amount of time."""
@@ -0,0 +1,17 @@
+"""Timing benchmarks of the Rain Bird integration against the LNK simulator."""
+import time
+
+
+async def timed(coroutine) -> float:
+    """Await a coroutine and return how long it took in seconds."""
+    started = time.monotonic()
+    await coroutine
+    return time.monotonic() - started
+
+
+def report(title: str, samples) -> dict:
+    """Print average and worst of latency samples in milliseconds and return them."""
+    result = {"average": sum(samples) / len(samples) * 1000, "worst": max(samples) * 1000}
+    print("%-50s average %8.1f ms, worst %8.1f ms, %d samples" % (title, result["average"], result["worst"],
+                                                                   len(samples)))
+    return result
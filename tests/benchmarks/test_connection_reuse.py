@@ -0,0 +1,45 @@
+"""Poll latency with the pooled keep-alive session compared to a new connection for every request."""
+import aiohttp
+import pytest
+
+from custom_components.rainbird.client import create_session
+from custom_components.rainbird.request_queue import PRIORITY_POLL
+
+from . import report, timed
+from ..simulator import LnkSimulator
+
+pytestmark = pytest.mark.benchmark
+
+POLLS = 50
+# Localhost hides most of the handshake cost, a small latency keeps the simulator realistic.
+LATENCY = 0.005
+
+
+async def _async_poll(controller):
+    await controller.get_zone_states(priority=PRIORITY_POLL)
+    await controller.get_combined_state(priority=PRIORITY_POLL)
+
+
+async def _async_measure(controller_factory, session) -> tuple:
+    async with LnkSimulator(latency=LATENCY) as sim:
+        controller = controller_factory(sim, session=session)
+        samples = [await timed(_async_poll(controller)) for _ in range(POLLS)]
+    return samples, sim.connections
+
+
+async def test_connection_reuse(controller_factory):
+    pooled = create_session()
+    fresh = aiohttp.ClientSession(connector=aiohttp.TCPConnector(force_close=True))
+    try:
+        reused, reused_connections = await _async_measure(controller_factory, pooled)
+        not_reused, new_connections = await _async_measure(controller_factory, fresh)
+    finally:
+        await pooled.close()
+        await fresh.close()
+
+    print()
+    report("Poll with connection reuse, %d connections" % reused_connections, reused)
+    report("Poll without connection reuse, %d connections" % new_connections, not_reused)
+    # Timing on localhost is too noisy to assert on, the number of connections is not.
+    assert reused_connections == 1
+    assert new_connections == 2 * POLLS
@@ -0,0 +1,70 @@
+"""Setup, poll cycle and command latency of 1 to 50 controllers, each served by its own simulator."""
+import asyncio
+import time
+
+import pytest
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.helpers import entity_registry
+from homeassistant.setup import async_setup_component
+
+from custom_components.rainbird import DOMAIN
+
+from . import report, timed
+from ..conftest import config_entry_for
+from ..simulator import LnkSimulator
+
+pytestmark = pytest.mark.benchmark
+
+LATENCY = 0.05
+CYCLES = 5
+# Generous bounds, a regression of the request path shows up as an order of magnitude.
+MAX_SETUP = 30
+MAX_CYCLE = 2
+MAX_COMMAND = 1
+
+
+@pytest.mark.parametrize("controllers", [1, 10, 50])
+async def test_controllers(hass, controllers):
+    simulators = [LnkSimulator(stations=8, latency=LATENCY, seed=i) for i in range(controllers)]
+    for sim in simulators:
+        await sim.start()
+    entries = [config_entry_for(sim) for sim in simulators]
+    try:
+        for entry in entries:
+            entry.add_to_hass(hass)
+        started = time.monotonic()
+        assert await async_setup_component(hass, DOMAIN, {})
+        await hass.async_block_till_done()
+        setup = time.monotonic() - started
+        assert all(entry.state == ConfigEntryState.LOADED for entry in entries)
+        registry = entity_registry.async_get(hass)
+        for entry in entries:
+            # Entities of every controller are registered, not only those of the first one.
+            unique_ids = {(entity.domain, entity.unique_id)
+                          for entity in entity_registry.async_entries_for_config_entry(registry, entry.entry_id)}
+            assert ("binary_sensor", "rainbird_%s_rainsensor" % entry.entry_id) in unique_ids
+            assert all(("switch", "rainbird_%s_switch_%d" % (entry.entry_id, zone)) in unique_ids
+                       for zone in range(1, 9))
+        data = [hass.data[DOMAIN][entry.entry_id] for entry in entries]
+
+        cycles = []
+        for _ in range(CYCLES):
+            cycles += await asyncio.gather(*[timed(d.coordinator.async_refresh()) for d in data])
+        assert all(d.coordinator.last_update_success for d in data)
+        commands = await asyncio.gather(*[timed(d.client.irrigate_zone(1, 1)) for d in data])
+        commands += await asyncio.gather(*[timed(d.client.stop_irrigation()) for d in data])
+
+        print()
+        report("Setup of %d controllers" % controllers, [setup])
+        cycle = report("Poll cycle, %d controllers" % controllers, cycles)
+        command = report("Command, %d controllers" % controllers, commands)
+        assert sum(sim.rejected for sim in simulators) == 0
+        assert setup < MAX_SETUP
+        assert cycle["worst"] < MAX_CYCLE * 1000
+        assert command["worst"] < MAX_COMMAND * 1000
+    finally:
+        for entry in entries:
+            await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+        for sim in simulators:
+            await sim.stop()
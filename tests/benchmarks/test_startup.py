@@ -0,0 +1,56 @@
+"""Import time of the integration and setup time of an entry."""
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from homeassistant.config_entries import ConfigEntryState
+
+from . import report
+from ..conftest import config_entry_for
+
+pytestmark = pytest.mark.benchmark
+
+ROOT = Path(__file__).parent.parent.parent
+IMPORTS = 5
+SETUPS = 5
+# Home Assistant has loaded these before any integration is imported.
+PRELOADED = ("import homeassistant.config_entries, homeassistant.helpers.config_validation, "
+             "homeassistant.helpers.dispatcher, homeassistant.helpers.entity, homeassistant.helpers.event, "
+             "homeassistant.helpers.storage, homeassistant.helpers.update_coordinator")
+MEASURE = "import time\nstarted = time.perf_counter()\nimport %s\nprint(time.perf_counter() - started)"
+
+
+def _import_time(modules: str) -> float:
+    """Return seconds it took to import modules in a fresh interpreter."""
+    output = subprocess.run([sys.executable, "-c", PRELOADED + "\n" + MEASURE % modules], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout
+    return float(output)
+
+
+def test_import_time():
+    print()
+    # The platforms are imported together with pyrainbird when an entry is set up.
+    for modules in ("custom_components.rainbird", "custom_components.rainbird.config_flow",
+                    "custom_components.rainbird.switch, custom_components.rainbird.sensor, "
+                    "custom_components.rainbird.binary_sensor"):
+        report("Import of %s" % modules.split(",")[0], [_import_time(modules) for _ in range(IMPORTS)])
+
+
+async def test_setup_time(hass, simulator):
+    entry = config_entry_for(simulator)
+    entry.add_to_hass(hass)
+    samples = []
+    for _ in range(SETUPS):
+        started = time.monotonic()
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        samples.append(time.monotonic() - started)
+        assert entry.state == ConfigEntryState.LOADED
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+
+    print()
+    report("First setup, topology probed", samples[:1])
+    report("Setup with cached topology", samples[1:])
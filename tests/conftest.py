@@ -0,0 +1,59 @@
+"""Fixtures shared by tests and benchmarks of the Rain Bird integration."""
+import pytest
+from homeassistant.const import CONF_HOST, CONF_PASSWORD, CONF_SCAN_INTERVAL
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.rainbird import CONF_MIN_REQUEST_GAP, DOMAIN
+from custom_components.rainbird.breaker import RainbirdCircuitBreaker
+from custom_components.rainbird.client import AsyncRainbirdController, RainbirdClient, create_session
+from custom_components.rainbird.request_queue import RainbirdRequestQueue
+
+from .simulator import DEFAULT_PASSWORD, LnkSimulator
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    yield
+
+
+@pytest.fixture(autouse=True)
+def allow_local_sockets(socket_enabled):
+    """The simulator listens on 127.0.0.1, nothing else is ever contacted."""
+    yield
+
+
+@pytest.fixture
+async def simulator():
+    async with LnkSimulator(seed=0) as sim:
+        yield sim
+
+
+@pytest.fixture
+async def controller_factory():
+    """Return a factory of `AsyncRainbirdController` talking to a simulator, everything is closed after the test."""
+    sessions = []
+    queues = []
+
+    def _create(sim: LnkSimulator, password=DEFAULT_PASSWORD, session=None, **kwargs):
+        if session is None:
+            session = create_session()
+            sessions.append(session)
+        queue = RainbirdRequestQueue(sim.host, kwargs.pop("min_gap", 0))
+        queues.append(queue)
+        kwargs.setdefault("retry", 1)
+        kwargs.setdefault("retry_sleep", 0)
+        return AsyncRainbirdController(RainbirdClient(session, sim.host, password, queue,
+                                                      RainbirdCircuitBreaker(sim.host), **kwargs))
+
+    yield _create
+    for queue in queues:
+        queue.close()
+    for session in sessions:
+        await session.close()
+
+
+def config_entry_for(sim: LnkSimulator, **data) -> MockConfigEntry:
+    """Return a config entry of the integration connected to a simulator."""
+    data = dict({CONF_HOST: sim.host, CONF_PASSWORD: sim.password, CONF_SCAN_INTERVAL: 20, CONF_MIN_REQUEST_GAP: 0},
+                **data)
+    return MockConfigEntry(domain=DOMAIN, title=sim.host, data=data, options=data)
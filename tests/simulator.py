@@ -0,0 +1,164 @@
+"""In-process simulator of the `/stick` endpoint of a Rain Bird LNK WiFi Module."""
+import asyncio
+import json
+import random
+import time
+import weakref
+
+from aiohttp import web
+from pyrainbird.encryption import decrypt, encrypt
+
+from custom_components.rainbird import RAINBIRD_MODELS
+
+DEFAULT_PASSWORD = "secret"
+DEFAULT_MODEL = 0x007  # ESP-Me
+
+
+def zones_to_mask(zones, count=32) -> str:
+    """Return the hex mask pyrainbird `States` decodes back to given 1-based zones."""
+    mask = bytearray(count // 8)
+    for zone in zones:
+        mask[(zone - 1) // 8] |= 1 << ((zone - 1) % 8)
+    return mask.hex().upper()
+
+
+class LnkSimulator:
+    """LNK module of a controller model from `RAINBIRD_MODELS` with a configurable number of stations.
+
+    Like the real module it serves one request at a time, a request arriving while another one is being answered is
+    refused with HTTP 503. `latency` delays every answer and `loss` is the probability that a request is dropped by
+    closing the connection without any answer.
+    """
+
+    def __init__(self, model=DEFAULT_MODEL, stations=8, password=DEFAULT_PASSWORD, latency=0., loss=0.,
+                 combined_state=True, version=(2, 9), serial_number=0x123456789ABC, seed=None):
+        if model not in RAINBIRD_MODELS:
+            raise ValueError("Unknown model %#05x" % model)
+        self.model = model
+        self.stations = stations
+        self.password = password
+        self.latency = latency
+        self.loss = loss
+        self.combined_state = combined_state
+        self.version = version
+        self.serial_number = serial_number
+        self.rain_sensor = False
+        self.rain_delay = 0
+        self.seasonal_adjust = 100
+        self.clock_offset = 0
+        self.active_zone = 0
+        self.run_end = 0.
+        self.requests = 0
+        self.commands = []
+        self.rejected = 0
+        self.dropped = 0
+        self.connections = 0
+        self._transports = weakref.WeakSet()
+        self._busy = False
+        self._random = random.Random(seed)
+        self._runner = None
+        self.host = None
+
+    async def start(self) -> str:
+        """Start listening on a free local port and return the `host:port` to connect to."""
+        app = web.Application()
+        app.router.add_post("/stick", self._handle)
+        self._runner = web.AppRunner(app, handle_signals=False, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]  # pylint: disable=protected-access
+        self.host = "127.0.0.1:%d" % port
+        return self.host
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        if request.transport not in self._transports:
+            self._transports.add(request.transport)
+            self.connections += 1
+        if self._busy:
+            self.rejected += 1
+            return web.Response(status=503)
+        self._busy = True
+        try:
+            body = await request.read()
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            if self.loss and self._random.random() < self.loss:
+                self.dropped += 1
+                request.transport.close()
+                return web.Response(status=500)
+            self.requests += 1
+            try:
+                call = json.loads(self._decrypt(body))
+            except (ValueError, UnicodeDecodeError):
+                return web.Response(status=403)
+            data = self.answer(call["params"]["data"].upper())
+            payload = json.dumps({"jsonrpc": "2.0", "result": {"length": len(data) // 2, "data": data},
+                                  "id": call["id"]})
+            return web.Response(body=encrypt(payload, self.password) if self.password else payload.encode())
+        finally:
+            self._busy = False
+
+    def _decrypt(self, body: bytes) -> str:
+        if self.password:
+            body = decrypt(body, self.password)
+        return body.decode("UTF-8").rstrip("\x10").rstrip("\x0A").rstrip("\x00").rstrip()
+
+    def answer(self, data: str) -> str:
+        """Return the hex encoded SIP response to a hex encoded SIP request."""
+        command = data[:2]
+        self.commands.append(command)
+        if self.active_zone and time.monotonic() >= self.run_end:
+            self.active_zone = 0
+        if command == "02":
+            return "82%04X%02X%02X" % (self.model, self.version[0], self.version[1])
+        if command == "03":
+            return "83%s%s" % (data[2:4], zones_to_mask(range(1, self.stations + 1)))
+        if command == "05":
+            return "85%016X" % self.serial_number
+        if command == "3E":
+            return "BE%02X" % self.rain_sensor
+        if command == "3F":
+            return "BF%s%s" % (data[2:4], zones_to_mask([self.active_zone] if self.active_zone else []))
+        if command == "36":
+            return "B6%04X" % self.rain_delay
+        if command == "4C" and self.combined_state:
+            now = time.localtime(time.time() + self.clock_offset)
+            remaining = max(0, int(self.run_end - time.monotonic())) if self.active_zone else 0
+            return "CC%02X%02X%02X%02X%X%03X%04X%02X%02X%04X%04X%02X" % (
+                now.tm_hour, now.tm_min, now.tm_sec, now.tm_mday, now.tm_mon, now.tm_year, self.rain_delay,
+                self.rain_sensor, 1, self.seasonal_adjust, remaining, self.active_zone)
+        if command == "39":
+            zone, minutes = int(data[2:6], 16), int(data[6:8], 16)
+            if not 1 <= zone <= self.stations:
+                return "0039" + "04"
+            self.active_zone = zone
+            self.run_end = time.monotonic() + minutes * 60
+            return "0139"
+        if command == "40":
+            self.active_zone = 0
+            return "0140"
+        if command == "20":
+            return "A0%s%s" % (data[2:6], self.schedule_block(int(data[2:6], 16)))
+        return "00%s01" % command
+
+    def schedule_block(self, block: int) -> str:
+        if block == 0x10:
+            return "0000%02X%02X" % (self.rain_delay, self.rain_sensor)
+        if 0x60 <= block < 0x80:
+            return "7F000000000001"
+        if 0x80 <= block < 0x100:
+            return "0168FFFFFFFFFFFF"
+        return "000A000A000A"
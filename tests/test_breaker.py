@@ -0,0 +1,137 @@
+"""Tests of the circuit breaker."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from custom_components.rainbird import breaker as breaker_module
+from custom_components.rainbird.breaker import STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN, RainbirdCircuitBreaker
+from custom_components.rainbird.client import RainbirdUnavailableError
+
+from .simulator import LnkSimulator
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(breaker_module, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+@pytest.fixture
+def breaker(clock):
+    return RainbirdCircuitBreaker("rainbird.test", failure_threshold=3, min_backoff=30, max_backoff=100)
+
+
+def test_opens_after_threshold(breaker):
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == STATE_CLOSED
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    assert not breaker.allow_request()
+
+
+def test_success_resets_failures(breaker):
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == STATE_CLOSED
+
+
+def test_probe_after_backoff(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 30
+
+    assert breaker.allow_request()
+    assert breaker.state == STATE_HALF_OPEN
+    breaker.record_success()
+    assert breaker.state == STATE_CLOSED
+
+
+def test_failed_probe_doubles_backoff_up_to_maximum(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+    for backoff in (60, 100, 100):
+        clock.now += 1000
+        assert breaker.allow_request()
+        breaker.record_failure()
+        assert breaker.diagnostics()["backoff"] == backoff
+        clock.now += backoff - 1
+        assert not breaker.allow_request()
+
+
+def test_released_probe_keeps_backoff(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow_request()
+
+    breaker.release_probe()
+
+    assert breaker.state == STATE_OPEN
+    assert breaker.diagnostics()["backoff"] == 30
+    assert not breaker.allow_request()
+    clock.now += 30
+    assert breaker.allow_request()
+
+
+def test_state_changes_are_announced(clock):
+    changes = []
+    breaker = RainbirdCircuitBreaker("rainbird.test", failure_threshold=1, on_change=lambda: changes.append(1))
+
+    breaker.record_failure()
+    breaker.record_success()
+
+    assert len(changes) == 2
+
+
+async def test_open_breaker_refuses_requests_without_io(simulator, controller_factory):
+    controller = controller_factory(simulator)
+    controller.breaker.failure_threshold = 1
+    controller.breaker.record_failure()
+
+    with pytest.raises(RainbirdUnavailableError):
+        await controller.get_zone_states()
+    assert simulator.requests == 0
+
+
+async def test_cancelled_request_is_not_a_failure(controller_factory):
+    async with LnkSimulator(latency=1) as sim:
+        controller = controller_factory(sim)
+        controller.breaker.failure_threshold = 1
+        task = asyncio.ensure_future(controller.get_zone_states())
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    assert controller.breaker.failures == 0
+    assert controller.breaker.state == STATE_CLOSED
+
+
+async def test_cancelled_probe_allows_next_probe(controller_factory, clock):
+    async with LnkSimulator(latency=1) as sim:
+        controller = controller_factory(sim)
+        controller.breaker.failure_threshold = 1
+        controller.breaker.record_failure()
+        clock.now += controller.breaker.min_backoff
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(controller.get_zone_states(), 0.1)
+
+        assert controller.breaker.state == STATE_OPEN
+        clock.now += controller.breaker.min_backoff
+        assert controller.breaker.allow_request()
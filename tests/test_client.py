@@ -0,0 +1,102 @@
+"""Tests of the asyncio client against the LNK simulator."""
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from custom_components.rainbird.client import RainbirdAuthError, RainbirdError
+
+from .simulator import LnkSimulator
+
+
+async def test_model_and_version(simulator, controller_factory):
+    controller = controller_factory(simulator)
+
+    model_and_version = await controller.get_model_and_version()
+
+    assert model_and_version.model == simulator.model
+    assert (model_and_version.major, model_and_version.minor) == simulator.version
+
+
+async def test_available_stations(controller_factory):
+    async with LnkSimulator(stations=12) as sim:
+        stations = await controller_factory(sim).get_available_stations()
+
+    assert [i + 1 for i, state in enumerate(stations.stations.states) if state] == list(range(1, 13))
+
+
+async def test_irrigate_and_stop(simulator, controller_factory):
+    controller = controller_factory(simulator)
+
+    assert await controller.irrigate_zone(3, 5)
+    assert (await controller.get_zone_states()).active(3)
+    assert (await controller.get_combined_state())["activeStation"] == 3
+    assert await controller.stop_irrigation()
+    assert not any((await controller.get_zone_states()).states)
+
+
+async def test_irrigate_unknown_zone_is_refused(simulator, controller_factory):
+    with pytest.raises(RainbirdError):
+        await controller_factory(simulator).irrigate_zone(simulator.stations + 1, 5)
+
+
+async def test_combined_state_not_supported(controller_factory):
+    async with LnkSimulator(combined_state=False) as sim:
+        assert await controller_factory(sim).get_combined_state() is None
+
+
+async def test_wrong_password(simulator, controller_factory):
+    with pytest.raises(RainbirdAuthError):
+        await controller_factory(simulator, password="wrong").get_model_and_version()
+
+
+async def test_concurrent_requests_are_serialized(simulator, controller_factory):
+    simulator.latency = 0.02
+    controller = controller_factory(simulator)
+
+    await asyncio.gather(*[controller.get_zone_states() for _ in range(5)])
+
+    assert simulator.requests == 5
+    assert simulator.rejected == 0
+
+
+async def test_lost_requests_are_retried(controller_factory):
+    async with LnkSimulator(loss=0.5, seed=1) as sim:
+        controller = controller_factory(sim, retry=20)
+        for _ in range(5):
+            await controller.get_zone_states()
+
+    assert sim.dropped > 0
+    assert sim.requests == 5
+
+
+class TruncatingSimulator(LnkSimulator):
+    def answer(self, data: str) -> str:
+        return super(TruncatingSimulator, self).answer(data)[:2]
+
+
+class PlainHttpServer(LnkSimulator):
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        return web.Response(body=b"<html>It works!</html>")
+
+
+@pytest.mark.parametrize("simulator_type", [TruncatingSimulator, PlainHttpServer])
+async def test_malformed_response(controller_factory, simulator_type):
+    async with simulator_type() as sim:
+        with pytest.raises(RainbirdError, match="malformed"):
+            await controller_factory(sim).get_model_and_version()
+
+
+async def test_unsupported_model(controller_factory):
+    async with LnkSimulator() as sim:
+        sim.model = 0x0FF
+        with pytest.raises(RainbirdError, match="unsupported model"):
+            await controller_factory(sim).get_model_and_version()
+
+
+@pytest.mark.parametrize("command, args", [("NoSuchCommand", ()), ("CurrentStationsActive", (0, 1, 2)),
+                                           ("ManuallyRunStation", ("one", 5))])
+async def test_unencodable_command(simulator, controller_factory, command, args):
+    with pytest.raises(RainbirdError, match="Unable to encode"):
+        await controller_factory(simulator).raw_command(command, *args)
+    assert simulator.requests == 0
@@ -0,0 +1,120 @@
+"""Tests of coalescing of switch commands."""
+import asyncio
+
+import pytest
+
+from custom_components.rainbird.client import RainbirdError
+from custom_components.rainbird.coalescer import RainbirdCommandCoalescer
+
+WINDOW = 0.01
+
+
+class RecordingController:
+    """Stands in for `AsyncRainbirdController` and records the commands sent to it."""
+
+    host = "rainbird.test"
+
+    def __init__(self, error=None):
+        self.sent = []
+        self.error = error
+        self.stop_delay = 0
+
+    async def irrigate_zone(self, zone, minutes):
+        self.sent.append(("irrigate", zone, minutes))
+        if self.error:
+            raise self.error
+        return True
+
+    async def stop_irrigation(self):
+        self.sent.append(("stop",))
+        await asyncio.sleep(self.stop_delay)
+        return True
+
+
+@pytest.fixture
+def controller():
+    return RecordingController()
+
+
+@pytest.fixture
+async def coalescer(controller):
+    coalescer = RainbirdCommandCoalescer(controller, WINDOW)
+    yield coalescer
+    coalescer.close()
+
+
+async def test_single_command_is_sent(coalescer, controller):
+    assert await coalescer.irrigate_zone(1, 5)
+    assert controller.sent == [("irrigate", 1, 5)]
+
+
+async def test_commands_for_different_zones_are_all_sent(coalescer, controller):
+    assert await asyncio.gather(coalescer.irrigate_zone(1, 5), coalescer.irrigate_zone(2, 5)) == [True, True]
+    assert controller.sent == [("irrigate", 1, 5), ("irrigate", 2, 5)]
+    assert coalescer.coalesced == 0
+
+
+async def test_stop_of_other_zone_keeps_run(coalescer, controller):
+    assert await asyncio.gather(coalescer.irrigate_zone(1, 5), coalescer.stop_irrigation(2)) == [True, True]
+    assert controller.sent == [("stop",), ("irrigate", 1, 5)]
+
+
+async def test_later_command_for_zone_supersedes_earlier(coalescer, controller):
+    assert await asyncio.gather(coalescer.irrigate_zone(1, 5), coalescer.stop_irrigation(1)) == [False, True]
+    assert controller.sent == [("stop",)]
+    assert coalescer.coalesced == 1
+
+
+async def test_stop_of_controller_supersedes_all_runs(coalescer, controller):
+    results = await asyncio.gather(coalescer.irrigate_zone(1, 5), coalescer.irrigate_zone(2, 5),
+                                   coalescer.stop_irrigation(3), coalescer.stop_irrigation(),
+                                   coalescer.irrigate_zone(4, 5))
+
+    assert results == [False, False, True, True, True]
+    assert controller.sent == [("stop",), ("irrigate", 4, 5)]
+
+
+async def test_identical_commands_share_result(coalescer, controller):
+    assert await asyncio.gather(coalescer.irrigate_zone(1, 5), coalescer.irrigate_zone(1, 5)) == [True, True]
+    assert controller.sent == [("irrigate", 1, 5)]
+    assert coalescer.coalesced == 1
+
+
+async def test_error_is_passed_only_to_callers_of_failed_command(controller, coalescer):
+    controller.error = RainbirdError("refused")
+
+    results = await asyncio.gather(coalescer.irrigate_zone(1, 5), coalescer.stop_irrigation(2),
+                                   return_exceptions=True)
+
+    assert results[0] is controller.error
+    assert results[1] is True
+
+
+async def test_commands_after_window_are_sent_separately(coalescer, controller):
+    await coalescer.irrigate_zone(1, 5)
+    await coalescer.irrigate_zone(1, 5)
+
+    assert controller.sent == [("irrigate", 1, 5), ("irrigate", 1, 5)]
+
+
+async def test_windows_are_sent_in_order(coalescer, controller):
+    controller.stop_delay = WINDOW * 5
+    first = asyncio.gather(coalescer.stop_irrigation(5), coalescer.irrigate_zone(3, 5))
+    # The stop of the first window is still being sent when the second window closes.
+    await asyncio.sleep(WINDOW * 2)
+    second = coalescer.stop_irrigation(3)
+
+    assert await asyncio.gather(first, second) == [[True, True], True]
+    assert controller.sent == [("stop",), ("irrigate", 3, 5), ("stop",)]
+
+
+async def test_close_cancels_pending_commands(controller):
+    coalescer = RainbirdCommandCoalescer(controller, 10)
+    task = asyncio.ensure_future(coalescer.irrigate_zone(1, 5))
+    await asyncio.sleep(0)
+
+    coalescer.close()
+
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert controller.sent == []
@@ -0,0 +1,112 @@
+"""Tests of the adaptive poll interval of the coordinator against the LNK simulator."""
+import time
+
+import pytest
+
+from custom_components.rainbird.coordinator import RainbirdUpdateCoordinator
+
+from .simulator import LnkSimulator
+
+IDLE = 20
+MIN = 5
+MAX = 300
+
+
+def interval(coordinator) -> float:
+    return coordinator.update_interval.total_seconds()
+
+
+@pytest.fixture
+async def coordinator_factory(hass, controller_factory):
+    coordinators = []
+
+    def _create(sim: LnkSimulator):
+        coordinator = RainbirdUpdateCoordinator(hass, controller_factory(sim), sim.host, "entry",
+                                                lambda: list(range(1, sim.stations + 1)), IDLE, MIN, MAX)
+        coordinators.append(coordinator)
+        return coordinator
+
+    yield _create
+    for coordinator in coordinators:
+        coordinator.async_unload()
+
+
+@pytest.fixture
+async def coordinator(simulator, coordinator_factory):
+    return coordinator_factory(simulator)
+
+
+def start_zone(sim: LnkSimulator, zone: int, seconds: int):
+    sim.active_zone = zone
+    sim.run_end = time.monotonic() + seconds
+
+
+async def test_idle_interval_doubles_up_to_maximum(coordinator):
+    intervals = []
+    for _ in range(6):
+        await coordinator.async_refresh()
+        intervals.append(interval(coordinator))
+
+    assert intervals == [IDLE, 2 * IDLE, 4 * IDLE, 8 * IDLE, MAX, MAX]
+
+
+async def test_irrigating_polls_at_minimum(coordinator, simulator):
+    await coordinator.async_refresh()
+    await coordinator.async_refresh()
+    start_zone(simulator, 1, 600)
+
+    await coordinator.async_refresh()
+    assert interval(coordinator) == MIN
+
+    simulator.active_zone = 0
+    await coordinator.async_refresh()
+    assert interval(coordinator) == IDLE
+
+
+async def test_pending_run_polls_at_minimum(hass, coordinator):
+    await coordinator.async_refresh()
+
+    await coordinator.async_run_started(600)
+    await coordinator.async_refresh()
+
+    assert interval(coordinator) == MIN
+
+
+async def test_failures_back_off_beyond_maximum(coordinator_factory):
+    async with LnkSimulator() as sim:
+        coordinator = coordinator_factory(sim)
+        await coordinator.async_refresh()
+    # The simulator is stopped, nothing listens on its port anymore.
+    intervals = []
+    for _ in range(8):
+        await coordinator.async_refresh()
+        intervals.append(interval(coordinator))
+
+    assert not coordinator.last_update_success
+    assert intervals == [2 * IDLE, 4 * IDLE, 8 * IDLE, 16 * IDLE, 32 * IDLE, 4 * MAX, 4 * MAX, 4 * MAX]
+
+
+async def test_recovery_restarts_from_idle_interval(coordinator, simulator):
+    await coordinator.async_refresh()
+    simulator.loss = 1
+    await coordinator.async_refresh()
+    assert not coordinator.last_update_success
+
+    simulator.loss = 0
+    await coordinator.async_refresh()
+
+    assert coordinator.last_update_success
+    assert interval(coordinator) == IDLE
+
+
+async def test_changed_intervals_apply_in_place(coordinator, simulator):
+    await coordinator.async_refresh()
+    await coordinator.async_refresh()
+
+    coordinator.async_set_intervals(60, MIN, MAX)
+    assert interval(coordinator) == 60
+
+    start_zone(simulator, 1, 600)
+    await coordinator.async_refresh()
+    coordinator.async_set_intervals(60, 10, MAX)
+    assert interval(coordinator) == 10
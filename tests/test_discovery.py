@@ -0,0 +1,81 @@
+"""Tests of LAN discovery and of the config flow scanning a network."""
+import datetime
+from unittest.mock import patch
+
+import pytest
+from homeassistant import config_entries, data_entry_flow
+from homeassistant.const import CONF_HOST, CONF_PASSWORD, CONF_SCAN_INTERVAL
+
+from custom_components.rainbird import DOMAIN
+from custom_components.rainbird.client import create_session
+from custom_components.rainbird.discovery import DiscoveredController, async_probe, async_scan
+
+from .simulator import DEFAULT_PASSWORD, LnkSimulator
+from .test_client import PlainHttpServer
+
+
+@pytest.fixture
+async def session():
+    session = create_session()
+    yield session
+    await session.close()
+
+
+async def test_probe_lnk_module(session, simulator):
+    assert await async_probe(session, simulator.host, DEFAULT_PASSWORD) == DiscoveredController(simulator.host,
+                                                                                               simulator.model)
+
+
+async def test_probe_unknown_model(session):
+    async with LnkSimulator() as sim:
+        sim.model = 0x0FF
+        assert (await async_probe(session, sim.host, DEFAULT_PASSWORD)).model == 0x0FF
+
+
+async def test_probe_password_rejected(session, simulator):
+    assert (await async_probe(session, simulator.host, "wrong")).password_rejected
+
+
+async def test_probe_other_http_server(session):
+    async with PlainHttpServer() as server:
+        assert await async_probe(session, server.host, DEFAULT_PASSWORD) is None
+
+
+async def test_probe_unreachable_host(session):
+    async with LnkSimulator() as sim:
+        pass
+    assert await async_probe(session, sim.host, DEFAULT_PASSWORD, timeout=1) is None
+
+
+async def test_scan_refuses_large_network(session):
+    with pytest.raises(ValueError):
+        await async_scan(session, "10.0.0.0/16", DEFAULT_PASSWORD)
+
+
+async def test_scan_offers_found_modules(hass):
+    found = [DiscoveredController("192.168.1.20", password_rejected=True), DiscoveredController("192.168.1.10", 0x007)]
+    with patch("custom_components.rainbird.discovery.async_scan", return_value=found):
+        result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": config_entries.SOURCE_USER})
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], {CONF_HOST: "192.168.1.0/24", CONF_PASSWORD: DEFAULT_PASSWORD})
+
+    assert result["type"] == data_entry_flow.FlowResultType.FORM
+    assert result["step_id"] == "pick"
+    assert list(result["data_schema"].schema[CONF_HOST].container.values()) == [
+        "192.168.1.10 (ESP-Me)", "192.168.1.20 (password rejected, may not be a LNK module)"]
+
+    result = await hass.config_entries.flow.async_configure(result["flow_id"], {CONF_HOST: "192.168.1.10"})
+
+    assert result["step_id"] == "user"
+    defaults = {str(key): key.default() for key in result["data_schema"].schema}
+    assert defaults[CONF_HOST] == "192.168.1.10"
+    assert defaults[CONF_PASSWORD] == DEFAULT_PASSWORD
+    assert defaults[CONF_SCAN_INTERVAL] == {"seconds": 20, "minutes": 0, "hours": 0}
+    assert not any(isinstance(default, datetime.timedelta) for default in defaults.values())
+
+    with patch("custom_components.rainbird.async_setup_entry", return_value=True):
+        result = await hass.config_entries.flow.async_configure(result["flow_id"], {CONF_HOST: "192.168.1.10"})
+
+    assert result["type"] == data_entry_flow.FlowResultType.CREATE_ENTRY
+    assert result["data"][CONF_HOST] == "192.168.1.10"
+    assert result["data"][CONF_SCAN_INTERVAL] == 20
@@ -0,0 +1,90 @@
+"""Tests of zone run history and water usage."""
+from datetime import timedelta
+
+import pytest
+from pyrainbird import States
+
+from custom_components.rainbird.coordinator import RainbirdState
+from custom_components.rainbird.history import PERIOD_TODAY, PERIOD_WEEK, RainbirdRunHistory, parse_flow_rates
+
+from .simulator import zones_to_mask
+
+ENTRY_ID = "entry"
+MAX_ELAPSED = 300
+
+
+def state(*active) -> RainbirdState:
+    return RainbirdState(zones=States(zones_to_mask(active)), rain_sensor=False,
+                         running_zone=active[0] if active else 0)
+
+
+@pytest.fixture
+async def history(hass, freezer):
+    freezer.move_to("2026-10-14 10:00:00+00:00")
+    history = RainbirdRunHistory(hass, ENTRY_ID, {1: 10.})
+    await history.async_load()
+    return history
+
+
+def test_parse_flow_rates():
+    assert parse_flow_rates("1=12.5, 2=8") == {1: 12.5, 2: 8.}
+    assert parse_flow_rates("") == {}
+    with pytest.raises(ValueError):
+        parse_flow_rates("1:12.5")
+
+
+async def test_runtime_of_active_zone(history, freezer):
+    history.record(state(1), [1, 2], MAX_ELAPSED)
+    freezer.tick(timedelta(seconds=60))
+    history.record(state(1), [1, 2], MAX_ELAPSED)
+    freezer.tick(timedelta(seconds=60))
+    history.record(state(), [1, 2], MAX_ELAPSED)
+
+    assert history.runtime(1) == pytest.approx(2.)
+    assert history.runtime(2) == 0.
+    assert history.runtime() == pytest.approx(2.)
+    assert history.runtime(1, PERIOD_TODAY) == pytest.approx(2.)
+    assert history.water(1) == pytest.approx(20.)
+    assert history.water(2) is None
+    assert [seconds for _, seconds in history.zones[1].runs] == [120]
+
+
+async def test_outage_is_not_accounted_as_runtime(history, freezer):
+    history.record(state(1), [1], MAX_ELAPSED)
+    freezer.tick(timedelta(seconds=60))
+    history.record(state(1), [1], MAX_ELAPSED)
+    # The controller did not answer for six hours.
+    freezer.tick(timedelta(hours=6))
+    history.record(state(), [1], MAX_ELAPSED)
+
+    assert history.runtime(1) == pytest.approx((60 + MAX_ELAPSED) / 60)
+    assert [seconds for _, seconds in history.zones[1].runs] == [60 + MAX_ELAPSED]
+
+
+async def test_daily_and_weekly_runtime_reset(history, freezer):
+    history.record(state(1), [1], MAX_ELAPSED)
+    freezer.tick(timedelta(seconds=60))
+    history.record(state(), [1], MAX_ELAPSED)
+
+    freezer.tick(timedelta(days=1))
+    history.record(state(), [1], MAX_ELAPSED)
+    assert history.runtime(1, PERIOD_TODAY) == 0.
+    assert history.runtime(1, PERIOD_WEEK) == pytest.approx(1.)
+
+    freezer.tick(timedelta(days=7))
+    history.record(state(), [1], MAX_ELAPSED)
+    assert history.runtime(1, PERIOD_WEEK) == 0.
+    assert history.runtime(1) == pytest.approx(1.)
+
+
+async def test_history_survives_reload(hass, history, freezer):
+    history.record(state(1), [1], MAX_ELAPSED)
+    freezer.tick(timedelta(seconds=90))
+    history.record(state(), [1], MAX_ELAPSED)
+    await history.async_unload()
+
+    reloaded = RainbirdRunHistory(hass, ENTRY_ID)
+    await reloaded.async_load()
+
+    assert reloaded.runtime(1) == pytest.approx(1.5)
+    assert [seconds for _, seconds in reloaded.zones[1].runs] == [90]
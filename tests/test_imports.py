@@ -0,0 +1,14 @@
+"""Tests of the cost of importing the integration."""
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+
+def test_integration_does_not_import_pyrainbird():
+    # A fresh interpreter, pyrainbird is already imported in this one.
+    subprocess.run([sys.executable, "-c", "import sys\n"
+                    "import custom_components.rainbird, custom_components.rainbird.config_flow\n"
+                    "assert 'pyrainbird' not in sys.modules, 'pyrainbird was imported'"],
+                   cwd=ROOT, check=True)
@@ -0,0 +1,244 @@
+"""Tests of setup of the integration against the LNK simulator."""
+import asyncio
+import time
+
+import pytest
+import voluptuous as vol
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.helpers import entity_registry
+from homeassistant.util import dt as dt_util
+
+from custom_components.rainbird import DOMAIN, _async_run_commands, async_refresh_topology
+from custom_components.rainbird.client import RainbirdClient
+
+from .conftest import config_entry_for
+from .simulator import LnkSimulator
+
+
+async def test_setup_and_unload(hass, simulator):
+    entry = config_entry_for(simulator)
+    entry.add_to_hass(hass)
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert entry.state == ConfigEntryState.LOADED
+    data = hass.data[DOMAIN][entry.entry_id]
+    assert data.get_zones() == list(range(1, simulator.stations + 1))
+    assert data.coordinator.last_update_success
+    registry = entity_registry.async_get(hass)
+    assert registry.async_get_entity_id("switch", DOMAIN, "rainbird_%s_switch_1" % entry.entry_id) is not None
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert entry.state == ConfigEntryState.NOT_LOADED
+    assert simulator.host not in hass.data[DOMAIN]["controllers"]
+
+
+async def test_changed_scan_interval_applies_in_place(hass, simulator):
+    entry = config_entry_for(simulator)
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][entry.entry_id].coordinator
+
+    hass.config_entries.async_update_entry(entry, options=dict(entry.data, scan_interval=60))
+    await hass.async_block_till_done()
+
+    assert hass.data[DOMAIN][entry.entry_id].coordinator is coordinator
+    assert coordinator.update_interval.total_seconds() == 60
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_legacy_unique_ids_are_migrated(hass, simulator):
+    entry = config_entry_for(simulator)
+    entry.add_to_hass(hass)
+    registry = entity_registry.async_get(hass)
+    switch = registry.async_get_or_create("switch", DOMAIN, "rainbird_switch_1", config_entry=entry)
+    rain_sensor = registry.async_get_or_create("binary_sensor", DOMAIN, "rainbird_rainsensor", config_entry=entry)
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert registry.async_get(switch.entity_id).unique_id == "rainbird_%s_switch_1" % entry.entry_id
+    assert registry.async_get(rain_sensor.entity_id).unique_id == "rainbird_%s_rainsensor" % entry.entry_id
+    assert hass.states.get(switch.entity_id).state == "off"
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_vanished_zone_is_removed_with_its_sensors(hass):
+    async with LnkSimulator(stations=3) as sim:
+        entry = config_entry_for(sim)
+        entry.add_to_hass(hass)
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        registry = entity_registry.async_get(hass)
+        runtime_sensor = "rainbird_%s_runtime_3" % entry.entry_id
+        assert registry.async_get_entity_id("switch", DOMAIN, "rainbird_%s_switch_3" % entry.entry_id) is not None
+        assert registry.async_get_entity_id("sensor", DOMAIN, runtime_sensor) is not None
+
+        sim.stations = 2
+        await async_refresh_topology(hass, hass.data[DOMAIN][entry.entry_id])
+        await hass.async_block_till_done()
+
+        assert registry.async_get_entity_id("switch", DOMAIN, "rainbird_%s_switch_3" % entry.entry_id) is None
+        assert registry.async_get_entity_id("sensor", DOMAIN, runtime_sensor) is None
+        assert registry.async_get_entity_id("sensor", DOMAIN, "rainbird_%s_runtime_2" % entry.entry_id) is not None
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+
+
+async def test_command_errors_are_reported_per_command(hass, simulator):
+    entry = config_entry_for(simulator)
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    result = await _async_run_commands(hass, simulator.host, [
+        {"command": "NoSuchCommand"},
+        {"command": "CurrentStationsActive", "parameters": [0, 1, 2]},
+        {"command": "ModelAndVersion"},
+    ])
+
+    assert [command["error"] is not None for command in result["commands"]] == [True, True, False]
+    assert result["commands"][2]["response"]["modelID"] == simulator.model
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_command_service_fires_response(hass, simulator):
+    entry = config_entry_for(simulator)
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    events = []
+    hass.bus.async_listen("rainbird_command_response_event", events.append)
+
+    await hass.services.async_call(DOMAIN, "command", {"id": "test", "host": [simulator.host], "commands": [
+        {"command": "ModelAndVersion"}, {"command": "CurrentStationsActive", "parameters": 0}]}, blocking=True)
+    await hass.async_block_till_done()
+
+    assert events[0].data["id"] == "test"
+    assert [command["error"] for command in events[0].data["results"][0]["commands"]] == [None, None]
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+@pytest.mark.parametrize("data", [
+    {"commands": [{"parameters": [0]}]},
+    {"commands": "ModelAndVersion"},
+    {"commands": []},
+    {"command": "ModelAndVersion", "commands": [{"command": "ModelAndVersion"}]},
+    {},
+])
+async def test_malformed_command_call_is_refused(hass, simulator, data):
+    entry = config_entry_for(simulator)
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    with pytest.raises(vol.Invalid):
+        await hass.services.async_call(DOMAIN, "command", dict(data, host=simulator.host), blocking=True)
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_poll_reconciles_optimistic_switch(hass, simulator):
+    entry = config_entry_for(simulator)
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    entity_id = entity_registry.async_get(hass).async_get_entity_id("switch", DOMAIN,
+                                                                    "rainbird_%s_switch_1" % entry.entry_id)
+    assert hass.states.get(entity_id).state == "off"
+
+    # The switch was turned on, but the controller did not start the zone.
+    switch = hass.data["switch"].get_entity(entity_id)
+    switch._state = True
+    switch.async_write_ha_state()
+    await hass.data[DOMAIN][entry.entry_id].coordinator.async_refresh()
+
+    assert hass.states.get(entity_id).state == "off"
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_running_switch_reports_end_time(hass, simulator):
+    entry = config_entry_for(simulator, trigger_time=120)
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    entity_id = entity_registry.async_get(hass).async_get_entity_id("switch", DOMAIN,
+                                                                    "rainbird_%s_switch_1" % entry.entry_id)
+
+    await hass.services.async_call("switch", "turn_on", {"entity_id": entity_id}, blocking=True)
+
+    attributes = hass.states.get(entity_id).attributes
+    assert dt_util.parse_datetime(attributes["end_time"]) > dt_util.utcnow()
+    assert "remaining_time" not in attributes
+    await hass.services.async_call("switch", "turn_off", {"entity_id": entity_id}, blocking=True)
+    assert "end_time" not in hass.states.get(entity_id).attributes
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_quick_toggle_ends_with_last_command(hass, simulator):
+    entry = config_entry_for(simulator, trigger_time=120)
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    entity_id = entity_registry.async_get(hass).async_get_entity_id("switch", DOMAIN,
+                                                                    "rainbird_%s_switch_1" % entry.entry_id)
+
+    # The turn_on is superseded by the turn_off, neither of them fails.
+    await asyncio.gather(
+        hass.services.async_call("switch", "turn_on", {"entity_id": entity_id}, blocking=True),
+        hass.services.async_call("switch", "turn_off", {"entity_id": entity_id}, blocking=True))
+
+    assert hass.states.get(entity_id).state == "off"
+    # Nothing but the stop was sent, ManuallyRunStation is 0x39.
+    assert "39" not in simulator.commands
+    assert "40" in simulator.commands
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+class NoRetrySleepClient(RainbirdClient):
+    def __init__(self, *args, **kwargs):
+        kwargs["retry_sleep"] = 0
+        super(NoRetrySleepClient, self).__init__(*args, **kwargs)
+
+
+async def test_unreachable_controller_leaves_nothing_registered(hass, monkeypatch):
+    monkeypatch.setattr("custom_components.rainbird.client.RainbirdClient", NoRetrySleepClient)
+    async with LnkSimulator() as sim:
+        entry = config_entry_for(sim)
+    # The simulator is stopped, nothing listens on its port anymore.
+    entry.add_to_hass(hass)
+
+    assert not await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert entry.state == ConfigEntryState.SETUP_RETRY
+    assert entry.entry_id not in hass.data[DOMAIN]
+    assert sim.host not in hass.data[DOMAIN].get("controllers", {})
+    assert sim.host not in hass.data[DOMAIN].get("sessions", {})
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_silent_controller_is_probed_once(hass, monkeypatch):
+    monkeypatch.setattr("custom_components.rainbird.PROBE_REQUEST_TIMEOUT", 0.2)
+    async with LnkSimulator(latency=1) as sim:
+        entry = config_entry_for(sim)
+        entry.add_to_hass(hass)
+        started = time.monotonic()
+
+        assert not await hass.config_entries.async_setup(entry.entry_id)
+
+        # A single request which timed out, neither retried nor followed by the other probe requests.
+        assert time.monotonic() - started < 0.5
+        assert sim.connections == 1
+        assert entry.state == ConfigEntryState.SETUP_RETRY
+        assert await hass.config_entries.async_unload(entry.entry_id)
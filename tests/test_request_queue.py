@@ -0,0 +1,89 @@
+"""Tests of the per host request queue."""
+import asyncio
+import time
+
+import pytest
+
+from custom_components.rainbird.request_queue import PRIORITY_COMMAND, PRIORITY_POLL, RainbirdRequestQueue
+
+
+@pytest.fixture
+async def queue():
+    queue = RainbirdRequestQueue("rainbird.test", 0)
+    yield queue
+    queue.close()
+
+
+def request(log, name, delay=0.):
+    async def _request():
+        log.append(("start", name))
+        await asyncio.sleep(delay)
+        log.append(("end", name))
+        return name
+
+    return _request
+
+
+async def test_requests_do_not_overlap(queue):
+    log = []
+
+    results = await asyncio.gather(*[queue.submit(request(log, i, 0.01)) for i in range(3)])
+
+    assert results == [0, 1, 2]
+    assert log == [("start", 0), ("end", 0), ("start", 1), ("end", 1), ("start", 2), ("end", 2)]
+
+
+async def test_commands_overtake_polls(queue):
+    log = []
+    first = asyncio.ensure_future(queue.submit(request(log, "first", 0.01), PRIORITY_POLL))
+    await asyncio.sleep(0)
+    polls = [asyncio.ensure_future(queue.submit(request(log, "poll %d" % i), PRIORITY_POLL)) for i in range(2)]
+    command = asyncio.ensure_future(queue.submit(request(log, "command"), PRIORITY_COMMAND))
+
+    await asyncio.gather(first, command, *polls)
+
+    assert [name for event, name in log if event == "start"] == ["first", "command", "poll 0", "poll 1"]
+
+
+async def test_min_gap_between_requests(queue):
+    queue.min_gap = 0.05
+    started = []
+
+    async def _request():
+        started.append(time.monotonic())
+
+    await asyncio.gather(*[queue.submit(_request) for _ in range(3)])
+
+    assert all(b - a >= 0.045 for a, b in zip(started, started[1:]))
+
+
+async def test_error_is_passed_to_its_caller_only(queue):
+    async def _failing():
+        raise ValueError("failed")
+
+    results = await asyncio.gather(queue.submit(_failing), queue.submit(request([], "ok")), return_exceptions=True)
+
+    assert isinstance(results[0], ValueError)
+    assert results[1] == "ok"
+
+
+async def test_close_cancels_queued_requests():
+    queue = RainbirdRequestQueue("rainbird.test", 10)
+    await queue.submit(request([], "first"))
+    waiting = asyncio.ensure_future(queue.submit(request([], "second")))
+    await asyncio.sleep(0)
+    assert queue.depth == 1
+
+    queue.close()
+
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+
+
+async def test_diagnostics(queue):
+    await queue.submit(request([], "first"))
+
+    diagnostics = queue.diagnostics()
+
+    assert diagnostics["requests"] == 1
+    assert diagnostics["depth"] == 0
@@ -0,0 +1,54 @@
+"""Tests of decoding and caching of controller schedules."""
+import pytest
+
+from custom_components.rainbird.schedule import RainbirdScheduleCache, decode_schedule_block, schedule_blocks
+
+
+def test_schedule_blocks():
+    assert schedule_blocks(2, 3) == [0x10, 0x60, 0x61, 0x80, 0x81, 0x100, 0x101]
+
+
+@pytest.mark.parametrize("block, frame, decoded", [
+    (0x10, "A00010" "0005" "02" "01", {"station_delay": 5, "rain_delay": 2, "rain_sensor": 1}),
+    (0x61, "A00061" "7F0300000002", {"program": 1, "days_of_week_mask": 0x7F, "period": 3, "frequency": 2}),
+    (0x60, "A00060" "7F00", {"program": 0, "days_of_week_mask": 0x7F, "period": 0, "frequency": None}),
+    (0x82, "A00082" "0168" "FFFF" "03C0", {"program": 2, "start_times": ["06:00", "16:00"]}),
+    (0x80, "A00080" "FFFFFFFF", {"program": 0, "start_times": []}),
+    (0x101, "A00101" "000A0014", {"durations": [10, 20]}),
+])
+def test_decode_schedule_block(block, frame, decoded):
+    assert decode_schedule_block(block, frame) == decoded
+
+
+async def test_schedule_is_read_once(hass, simulator, controller_factory):
+    cache = RainbirdScheduleCache(hass, controller_factory(simulator), "entry")
+    await cache.async_load()
+
+    schedule = await cache.async_get(4, 8)
+    requests = simulator.requests
+
+    assert requests == len(schedule_blocks(4, 8))
+    assert schedule["version"] == 1
+    assert len(schedule["programs"]) == 4
+    assert schedule["programs"][0]["start_times"] == ["06:00"]
+    assert len(schedule["durations"]) == 4
+
+    assert await cache.async_get(4, 8) == schedule
+    assert simulator.requests == requests
+
+
+async def test_refresh_counts_changes(hass, simulator, controller_factory):
+    cache = RainbirdScheduleCache(hass, controller_factory(simulator), "entry")
+    await cache.async_load()
+    await cache.async_get(0, 2)
+
+    assert (await cache.async_get(0, 2, refresh=True))["version"] == 1
+    simulator.rain_delay = 3
+    schedule = await cache.async_get(0, 2, refresh=True)
+
+    assert schedule["version"] == 2
+    assert schedule["controller"]["rain_delay"] == 3
+
+    reloaded = RainbirdScheduleCache(hass, controller_factory(simulator), "entry")
+    await reloaded.async_load()
+    assert reloaded.version == 2
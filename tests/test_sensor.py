@@ -0,0 +1,34 @@
+"""Tests of the request statistics sensors."""
+from homeassistant.helpers import entity_registry
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.rainbird import DOMAIN
+from custom_components.rainbird.sensor import METRICS_UPDATE_INTERVAL
+
+from .conftest import config_entry_for
+
+
+async def test_metric_sensors_are_written_at_interval(hass, simulator):
+    entry = config_entry_for(simulator)
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    registry = entity_registry.async_get(hass)
+    requests = registry.async_get_entity_id("sensor", DOMAIN, "rainbird_%s_requests" % entry.entry_id)
+    latency = registry.async_get_entity_id("sensor", DOMAIN, "rainbird_%s_request_latency" % entry.entry_id)
+    written = hass.states.get(requests)
+
+    for _ in range(3):
+        await hass.data[DOMAIN][entry.entry_id].coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert hass.states.get(requests) is written
+
+    async_fire_time_changed(hass, dt_util.utcnow() + METRICS_UPDATE_INTERVAL)
+    await hass.async_block_till_done()
+
+    assert int(hass.states.get(requests).state) > int(written.state)
+    # Per command statistics are part of diagnostics only.
+    assert "ModelAndVersion" not in hass.states.get(latency).attributes
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
@@ -0,0 +1,108 @@
+"""Tests of zone sequences against the LNK simulator."""
+import asyncio
+from datetime import timedelta
+
+import pytest
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
+
+from custom_components.rainbird.coalescer import RainbirdCommandCoalescer
+from custom_components.rainbird.sequence import STORAGE_KEY, STORAGE_VERSION, RainbirdSequenceRunner
+
+ENTRY_ID = "entry"
+KEY = STORAGE_KEY.format(entry_id=ENTRY_ID)
+
+
+class Coordinator:
+    """Stands in for `RainbirdUpdateCoordinator`."""
+
+    def __init__(self):
+        self.runs = []
+
+    async def async_run_started(self, duration):
+        self.runs.append(duration)
+
+
+@pytest.fixture
+async def commands(simulator, controller_factory):
+    commands = RainbirdCommandCoalescer(controller_factory(simulator), 0.01)
+    yield commands
+    commands.close()
+
+
+@pytest.fixture
+async def runner(hass, commands):
+    runner = RainbirdSequenceRunner(hass, commands, Coordinator(), ENTRY_ID)
+    yield runner
+    runner.async_unload()
+
+
+def stored_progress(hass_storage, steps, index, end):
+    hass_storage[KEY] = {"version": STORAGE_VERSION, "key": KEY,
+                         "data": {"steps": steps, "index": index, "end": end.isoformat()}}
+
+
+async def test_start_runs_first_zone(hass, hass_storage, runner, simulator):
+    await runner.async_start([(2, 120), (3, 60)])
+    await hass.async_block_till_done()
+
+    assert runner.running
+    assert simulator.active_zone == 2
+    assert hass_storage[KEY]["data"]["steps"] == [[2, 120], [3, 60]]
+
+    await runner.async_stop()
+    assert not runner.running
+    assert simulator.active_zone == 0
+    assert KEY not in hass_storage
+
+
+async def test_steps_are_ordered_with_switch_commands(hass, runner, commands, simulator):
+    # A switch of another zone turned off at the same time stops the controller before the step starts.
+    await asyncio.gather(runner.async_start([(2, 120)]), commands.stop_irrigation(5))
+    await hass.async_block_till_done()
+
+    assert runner.running
+    assert simulator.active_zone == 2
+    await runner.async_stop()
+
+
+async def test_start_fails_when_first_zone_fails(hass, hass_storage, runner, simulator):
+    with pytest.raises(HomeAssistantError):
+        await runner.async_start([(simulator.stations + 1, 120), (1, 60)])
+    await hass.async_block_till_done()
+
+    assert not runner.running
+    assert KEY not in hass_storage
+
+
+async def test_restore_continues_with_current_step(hass, hass_storage, runner, simulator):
+    stored_progress(hass_storage, [[1, 120], [2, 600]], 0, dt_util.utcnow() - timedelta(seconds=60))
+
+    await runner.async_restore()
+    await hass.async_block_till_done()
+
+    assert runner.running
+    assert simulator.active_zone == 2
+    assert hass_storage[KEY]["data"]["index"] == 1
+
+
+async def test_restore_discards_progress_when_zone_fails(hass, hass_storage, runner, simulator):
+    stored_progress(hass_storage, [[1, 120], [simulator.stations + 1, 600]], 0,
+                    dt_util.utcnow() - timedelta(seconds=60))
+
+    await runner.async_restore()
+    await hass.async_block_till_done()
+
+    assert not runner.running
+    assert KEY not in hass_storage
+
+
+async def test_restore_discards_finished_sequence(hass, hass_storage, runner, simulator):
+    stored_progress(hass_storage, [[1, 120]], 0, dt_util.utcnow() - timedelta(seconds=60))
+
+    await runner.async_restore()
+    await hass.async_block_till_done()
+
+    assert not runner.running
+    assert simulator.commands == []
+    assert KEY not in hass_storage